@@ -2,11 +2,31 @@ import re
 import os
 import fitz
 import sqlite3
+import hashlib
+import time
+import argparse
+from functools import partial, lru_cache
+from itertools import chain, islice
+from contextlib import closing
 from datetime import datetime
+from citation_scanner import get_scanner
+from text_cache import TextCache, TEXT_CACHE_DIR, TEXT_CACHE_MAX_MB
+from ingestion_metrics import MetricsRecorder
+from reporter_matcher import get_reporter_matcher
+from pipeline import IngestPipeline, PREFETCH_FILES, PREFETCH_MB
+from urllib.parse import urlsplit
+from contents_index import DocumentIndex, load_known_paths, save_index
+from analytics import create_query_tables, refresh_summaries
+from search import create_search_tables, search_enabled, rebuild_citation_index, write_judgment_text, forget_judgments
+from near_duplicates import (MinHasher, minhash_signature, NearDuplicateIndex, create_signature_tables,
+                             signatures_enabled, forget_signatures, load_settings, save_settings, banding,
+                             THRESHOLD)
 
 PDF_FOLDER = "Jersey"
 DB_PATH = PDF_FOLDER + ".db"
 REPORTER_DB_PATH = "Reporters.db"
+# Each jurisdiction has its own table in Reporters.db (see shards.py).
+REPORTER_TABLE = "jersey_reporters"
 
 CITATION_PATTERN = (
     r"((?:[A-Z][A-Za-z0-9.,'’()\- &:]+v\.? [A-Z][A-Za-z0-9.,'’()\- &:]+|"
@@ -15,6 +35,12 @@ CITATION_PATTERN = (
 )
 NO_NAME_PATTERN = r"(\[\d{4}\]\s*\d{0,4}\s*[A-Za-z.]+[ ]+\s*\d{1,4}(?:\s[A-Za-z]+\s\d{1,4})?|\(\d{4}\)\s*\d{0,4}\s*[A-Za-z.]+[ ]+\s*\d{1,4}(?:\s[A-Za-z]+\s\d{1,4})?)"
 YEAR_REPORTER_PATTERN = r"\[(?P<year1>\d{4})\]\s*\d*\s(?P<rptr1>[A-Za-z. ]+)\s\d{1,4}|\((?P<year2>\d{4})\)\s*\d*\s(?P<rptr2>[A-Za-z. ]+)\s\d{1,4}"
+YEAR_REPORTER_RE = re.compile(YEAR_REPORTER_PATTERN)
+FOOTER_RE = re.compile(r'\d{1,2}\s[A-Za-z]{3,4}\s\d{4}\s\d{1,2}:\d{1,2}:\d{1,2}\s\d{1,3}\/\d{1,3}\sUser-generated version[A-Za-z ]+(?:\n(?:\d{1,3}\n)*)?')
+PAGE_NUMBER_LINES_RE = re.compile(r'(?:\d{1,3}\n)*')
+# The vLex header block (name, jurisdiction, citation, ...) sits on the first page.
+HEADER_PAGES = 2
+PROGRESS_SECONDS = 5
 
 def connect_db(db_path):
     return sqlite3.connect(db_path)
@@ -33,26 +59,106 @@ def create_tables(cur):
         link TEXT
     )
     """)
+    # One row per distinct authority (normalized citation); citations refer to it
+    # by id and keep only the text as written in the judgment.
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS authority (
+        authority_id INTEGER PRIMARY KEY,
+        normalized_citation TEXT UNIQUE,
+        citation TEXT,
+        reporter TEXT,
+        jurisdiction TEXT,
+        year INTEGER
+    )
+    """)
+    migrate_citations(cur)
     cur.execute("""
     CREATE TABLE IF NOT EXISTS citations (
         neutral_citation TEXT,
+        authority_id INTEGER,
         citation_name TEXT,
         citation TEXT,
-        reporter TEXT,
-        jurisdiction TEXT,
-        year INTEGER,
-        FOREIGN KEY (neutral_citation) REFERENCES main_paper(neutral_citation)
+        FOREIGN KEY (neutral_citation) REFERENCES main_paper(neutral_citation),
+        FOREIGN KEY (authority_id) REFERENCES authority(authority_id)
+    )
+    """)
+    cur.execute("""
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_citations_unique
+    ON citations (neutral_citation COLLATE NOCASE, authority_id)
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS ingest_manifest (
+        pdf_path TEXT PRIMARY KEY,
+        size INTEGER,
+        mtime_ns INTEGER,
+        content_hash TEXT,
+        neutral_citation TEXT
     )
     """)
 
+def migrate_citations(cur):
+    """
+    Moves a citations table that still stores reporter, jurisdiction, year (and
+    possibly no normalized_citation) per row over to authority ids. Each
+    authority takes the first row that has a reporter, else the first row. Row
+    ids are kept, so the citation name search index stays valid.
+    """
+    cur.execute("PRAGMA table_info(citations)")
+    columns = [row[1] for row in cur.fetchall()]
+    if not columns or "authority_id" in columns:
+        return
+    if "normalized_citation" not in columns:
+        cur.execute("ALTER TABLE citations ADD COLUMN normalized_citation TEXT")
+    cur.execute("SELECT rowid, citation FROM citations WHERE normalized_citation IS NULL")
+    backfill = [(clean_string(citation or ""), rowid) for rowid, citation in cur.fetchall()]
+    cur.executemany("UPDATE citations SET normalized_citation = ? WHERE rowid = ?", backfill)
+    # Keep the first occurrence of any duplicates, as the unique index does.
+    cur.execute("""
+        DELETE FROM citations WHERE rowid NOT IN (
+            SELECT MIN(rowid) FROM citations
+            GROUP BY neutral_citation COLLATE NOCASE, normalized_citation
+        )
+    """)
+    cur.execute("""
+        INSERT OR IGNORE INTO authority (normalized_citation, citation, reporter, jurisdiction, year)
+        SELECT normalized_citation, citation, reporter, jurisdiction, year FROM citations
+        ORDER BY COALESCE(reporter, '') = '', rowid
+    """)
+    cur.execute("""
+    CREATE TABLE citations_migrated (
+        neutral_citation TEXT,
+        authority_id INTEGER,
+        citation_name TEXT,
+        citation TEXT,
+        FOREIGN KEY (neutral_citation) REFERENCES main_paper(neutral_citation),
+        FOREIGN KEY (authority_id) REFERENCES authority(authority_id)
+    )
+    """)
+    cur.execute("""
+        INSERT INTO citations_migrated (rowid, neutral_citation, authority_id, citation_name, citation)
+        SELECT c.rowid, c.neutral_citation, a.authority_id, c.citation_name, c.citation
+        FROM citations c JOIN authority a ON a.normalized_citation = c.normalized_citation
+        ORDER BY c.rowid
+    """)
+    # Drops the old indexes and triggers with it; create_query_tables and
+    # create_search_tables put them back for the new columns.
+    cur.execute("DROP TABLE citations")
+    cur.execute("ALTER TABLE citations_migrated RENAME TO citations")
+    # Rows without a reporter may have picked one up from their authority, so
+    # the analytics summary is dropped and recounted in full.
+    cur.execute("DROP TABLE IF EXISTS reporter_year_summary")
+
+MONTHS = {
+    'jan': 'January', 'feb': 'February', 'mar': 'March', 'apr': 'April',
+    'may': 'May', 'jun': 'June', 'jul': 'July', 'aug': 'August',
+    'sep': 'September', 'oct': 'October', 'nov': 'November', 'dec': 'December'
+}
+MONTH_RE = re.compile(r"\b(" + "|".join(MONTHS) + r")\b", re.IGNORECASE)
+
+# Only a few hundred distinct date strings occur, so each is parsed once.
+@lru_cache(maxsize=4096)
 def parse_judgment_date(date_str):
-    months = {
-        'Jan': 'January', 'Feb': 'February', 'Mar': 'March', 'Apr': 'April',
-        'May': 'May', 'Jun': 'June', 'Jul': 'July', 'Aug': 'August',
-        'Sep': 'September', 'Oct': 'October', 'Nov': 'November', 'Dec': 'December'
-    }
-    for abbr, full in months.items():
-        date_str = re.sub(rf"\b{abbr}\b", full, date_str, flags=re.IGNORECASE)
+    date_str = MONTH_RE.sub(lambda m: MONTHS[m.group(1).lower()], date_str)
     date_str = date_str.strip()
     for fmt in ("%d %B %Y", "%d %b %Y", "%d %B, %Y", "%d %b, %Y"):
         try:
@@ -61,167 +167,760 @@ def parse_judgment_date(date_str):
             continue
     return date_str
 
+CASE_NAME_START = "Otherwise, distribution or reproduction is not permitted"
+CASE_NAME_END = "Jurisdiction:"
+CASE_NAME_TRAILING_RE = re.compile(r"[.,;:!?]$")
+
 def extract_case_name(text):
-    pattern = r"Otherwise, distribution or reproduction is not permitted(.*)\sJurisdiction:"
-    match = re.search(pattern, text, re.DOTALL)
-    if match:
-        case_name = match.group(1).strip()
-        case_name = re.sub(r"[.,;:!?]$", "", case_name)
-        return case_name
+    # Same result as re.search(CASE_NAME_START + r"(.*)\sJurisdiction:", text, re.DOTALL):
+    # the greedy group runs to the last whitespace-preceded "Jurisdiction:" in the
+    # whole text, found here with rfind instead of backtracking through it.
+    start = text.find(CASE_NAME_START)
+    if start == -1:
+        return None
+    start += len(CASE_NAME_START)
+    end = text.rfind(CASE_NAME_END, start + 1)
+    while end != -1 and not text[end - 1].isspace():
+        end = text.rfind(CASE_NAME_END, start + 1, end)
+    if end == -1:
+        return None
+    case_name = text[start:end - 1].strip()
+    case_name = CASE_NAME_TRAILING_RE.sub("", case_name)
+    return case_name
+
+METADATA_PATTERNS = {
+    "jurisdiction": r"Jurisdiction:\s*(.*)",
+    "judge": r"Judge:\s*(.*)",
+    "judgment_date": r"Judgment\sDate:\s*(.*)|Date:\s*(.*)",
+    "neutral_citation": r"Judgment\scitation\s\(vLex\):\s*(.*)|Neutral\sCitation:\s*(.*)",
+    "reported_in": r"Reported\sIn:\s*(.*)",
+    "court": r"Court:\s*(.*)Date|Court:\s(.*)",
+    "vlex_document_id": r"vLex Document Id:\s*(.*)",
+    "link": r"Link:\s*(.*)"
+}
+METADATA_RES = {key: re.compile(pat, re.IGNORECASE) for key, pat in METADATA_PATTERNS.items()}
+
+def _header_pattern():
+    # Every field as one zero-width alternative, so a single finditer sees each
+    # label where it starts even when it sits inside another field's value.
+    # No two labels can match at the same position.
+    parts = []
+    groups = {}
+    number = 1
+    for key, pat in METADATA_PATTERNS.items():
+        inner = METADATA_RES[key].groups
+        groups[key] = (number, tuple(range(number + 1, number + 1 + inner)))
+        parts.append(f"({pat})")
+        number += 1 + inner
+    return re.compile("(?=" + "|".join(parts) + ")", re.IGNORECASE), groups
+
+HEADER_RE, HEADER_GROUPS = _header_pattern()
+
+def field_value(values):
+    for value in values:
+        if value and value.strip():
+            return value.strip()
     return None
 
+def header_fields(text):
+    """
+    The first match of every METADATA_PATTERNS field in text, as
+    {key: (end, values)}, read from the vLex header block (everything up to the
+    Link: line) in one pass. Fields missing there, or whose match reaches the
+    end of the block and could continue past it, are searched in the whole text.
+    """
+    link = METADATA_RES["link"].search(text)
+    header = text[:link.end()] if link else text
+    found = {}
+    if link:
+        found["link"] = (link.end(), link.groups())
+    for m in HEADER_RE.finditer(header):
+        for key, (outer, inner) in HEADER_GROUPS.items():
+            if key not in found and m.start(outer) != -1:
+                found[key] = (m.end(outer), tuple(m.group(i) for i in inner))
+                break
+        if len(found) == len(HEADER_GROUPS):
+            break
+    for key, regex in METADATA_RES.items():
+        if key not in found or (key != "link" and found[key][0] >= len(header) and len(header) < len(text)):
+            m = regex.search(text)
+            found[key] = (m.end(), m.groups()) if m else None
+    return found
+
 def extract_metadata(text, new_text):
-    patterns = {
-        "jurisdiction": r"Jurisdiction:\s*(.*)",
-        "judge": r"Judge:\s*(.*)",
-        "judgment_date": r"Judgment\sDate:\s*(.*)|Date:\s*(.*)",
-        "neutral_citation": r"Judgment\scitation\s\(vLex\):\s*(.*)|Neutral\sCitation:\s*(.*)",
-        "reported_in": r"Reported\sIn:\s*(.*)",
-        "court": r"Court:\s*(.*)Date|Court:\s(.*)",
-        "vlex_document_id": r"vLex Document Id:\s*(.*)",
-        "link": r"Link:\s*(.*)"
-    }
     meta = {}
     meta["name"] = extract_case_name(new_text)
-    for key, pat in patterns.items():
-        m = re.search(pat, text, re.IGNORECASE)
-        value = None
-        if m:
-            for group in m.groups():
-                if group and group.strip():
-                    value = group.strip()
-                    break
+    fields = header_fields(text)
+    for key in METADATA_PATTERNS:
+        value = field_value(fields[key][1]) if fields[key] else None
         if key == "judgment_date" and value:
             value = parse_judgment_date(value)
         meta[key] = value
     return meta
 
-def reporter_jurisdiction_dict(reporterdbpath):
+def contents_metadata(entry):
+    # Same fields extract_metadata reads from the PDF header; the contents file
+    # has no judge.
+    properties = entry.get("properties") or {}
+    judgment_date = properties.get("Judgment Date") or properties.get("Date")
+    link = entry.get("public_url")
+    if link and entry.get("domain"):
+        link = entry["domain"] + urlsplit(link).path
+    return {
+        "name": entry.get("title"),
+        "jurisdiction": (entry.get("country") or {}).get("name"),
+        "judge": None,
+        "judgment_date": parse_judgment_date(judgment_date) if judgment_date else None,
+        "neutral_citation": properties.get("Neutral Citation"),
+        "reported_in": properties.get("Reported In"),
+        "court": properties.get("Court"),
+        "vlex_document_id": entry["vlex_document_id"],
+        "link": link,
+    }
+
+def fill_metadata(meta, seed_meta):
+    if seed_meta:
+        for key, value in seed_meta.items():
+            if meta.get(key) is None:
+                meta[key] = value
+    return meta
+
+def reporter_jurisdiction_dict(reporterdbpath, reporter_table=REPORTER_TABLE):
     connRep = sqlite3.connect(reporterdbpath)
     curRep = connRep.cursor()
-    curRep.execute("""
-                   SELECT Reporter_cleaned, Reporter, Jurisdiction FROM jersey_reporters
+    curRep.execute(f"""
+                   SELECT Reporter_cleaned, Reporter, Jurisdiction FROM {reporter_table}
                    """)
     rows = curRep.fetchall()
     connRep.close()
     return {row[0]: [row[1], row[2]] for row in rows}
 
-def extract_text_from_pdf(pdf_path):
+# Bump whenever extract_text_from_pdf output changes so cached text is not reused.
+EXTRACTOR_VERSION = 1
+
+def open_pdf(pdf_path, data=None):
+    # data holds the file bytes when a reader stage has already loaded them.
+    if data is not None:
+        return fitz.open(stream=data, filetype="pdf")
+    return fitz.open(pdf_path)
+
+def extract_text_from_pdf(pdf_path, data=None):
     text = ""
-    with fitz.open(pdf_path) as doc:
+    with open_pdf(pdf_path, data) as doc:
         for page in doc:
             text += page.get_text()
     new_text = text.replace('\n', ' ').replace('\r', ' ')
-    text = re.sub(r'\d{1,2}\s[A-Za-z]{3,4}\s\d{4}\s\d{1,2}:\d{1,2}:\d{1,2}\s\d{1,3}\/\d{1,3}\sUser-generated version[A-Za-z ]+(?:\n(?:\d{1,3}\n)*)?', ' ', text).strip()
+    text = FOOTER_RE.sub(' ', text).strip()
+    return text, new_text
+
+def cached_extract_text(pdf_path, content_hash, text_cache, data=None):
+    if text_cache is None:
+        return extract_text_from_pdf(pdf_path, data)
+    cached = text_cache.get(content_hash, EXTRACTOR_VERSION)
+    if cached is not None:
+        return cached
+    text, new_text = extract_text_from_pdf(pdf_path, data)
+    text_cache.put(content_hash, EXTRACTOR_VERSION, text, new_text)
     return text, new_text
 
+def iter_pdf_pages(pdf_path, data=None):
+    footer_ended_page = False
+    with open_pdf(pdf_path, data) as doc:
+        for page in doc:
+            page_text = page.get_text()
+            new_page_text = page_text.replace('\n', ' ').replace('\r', ' ')
+            if footer_ended_page:
+                # Over the whole document a footer closing one page also swallows
+                # the page-number lines that open the next.
+                page_text = page_text[PAGE_NUMBER_LINES_RE.match(page_text).end():]
+            pieces = []
+            last = 0
+            for footer in FOOTER_RE.finditer(page_text):
+                pieces.append(page_text[last:footer.start()])
+                pieces.append(' ')
+                last = footer.end()
+            pieces.append(page_text[last:])
+            footer_ended_page = last == len(page_text) and last > 0
+            yield "".join(pieces), new_page_text
+
+# The same authorities and reporter abbreviations recur across thousands of
+# judgments, so the normalizers are memoized.
+NORMALIZE_CACHE_SIZE = 1 << 16
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
 def clean_string(s):
     return re.sub(r'[^a-zA-Z0-9]', '', s.lower())
 
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
 def clean_citation_name(name):
     match = re.search(r"(See for example|See generally|See|see|\sin)\s+(.*)", name, flags=re.IGNORECASE)
     if match:
         return match.group(2).strip()
     return name.strip()
 
-def insert_main_paper(cur, meta):
-    cur.execute("""
-        INSERT OR REPLACE INTO main_paper
-        (neutral_citation, name, jurisdiction, judge, judgment_date, reported_in, court, vlex_document_id, link)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
+MAIN_PAPER_INSERT = """
+    INSERT OR REPLACE INTO main_paper
+    (neutral_citation, name, jurisdiction, judge, judgment_date, reported_in, court, vlex_document_id, link)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+# An authority keeps the citation text it was first seen with; its reporter,
+# jurisdiction and year are those of the latest run that cited it. The WHERE
+# skips no-op updates, which would still mark its summary group dirty.
+AUTHORITY_UPSERT = """
+    INSERT INTO authority
+    (authority_id, normalized_citation, citation, reporter, jurisdiction, year)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT (normalized_citation) DO UPDATE
+    SET reporter = excluded.reporter, jurisdiction = excluded.jurisdiction, year = excluded.year
+    WHERE (reporter, jurisdiction, year) IS NOT (excluded.reporter, excluded.jurisdiction, excluded.year)
+"""
+# The unique index on (neutral_citation, authority_id) rejects a citation
+# already stored for this judgment, keeping the first occurrence.
+CITATION_INSERT = """
+    INSERT OR IGNORE INTO citations
+    (neutral_citation, authority_id, citation_name, citation)
+    VALUES (?, ?, ?, ?)
+"""
+MANIFEST_INSERT = """
+    INSERT OR REPLACE INTO ingest_manifest (pdf_path, size, mtime_ns, content_hash, neutral_citation)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+# Judgments listed in a contents file without a PDF never replace a parsed row.
+MAIN_PAPER_SEED = MAIN_PAPER_INSERT.replace("INSERT OR REPLACE", "INSERT OR IGNORE")
+
+def main_paper_row(meta):
+    return (
         meta["neutral_citation"] or meta["reported_in"], meta["name"], meta["jurisdiction"], meta["judge"], meta["judgment_date"],
         meta["reported_in"], meta["court"], meta["vlex_document_id"], meta["link"]
-    ))
+    )
 
-def citation_exists(cur, neutral_citation, actual_citation):
-    cur.execute("""
-        SELECT citation FROM citations WHERE neutral_citation = ? COLLATE NOCASE
-    """, (neutral_citation,))
-    rows = cur.fetchall()
-    flat_list = [clean_string(row[0]) for row in rows]
-    return clean_string(actual_citation) in flat_list
+_reporter_lookups = {}
 
-def insert_citation(cur, meta, citation_name, actual_citation, reporter, jurisdiction, year):
-    cur.execute("""
-        INSERT OR REPLACE INTO citations (neutral_citation, citation_name, citation, reporter, jurisdiction, year)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (meta["neutral_citation"] or meta["reported_in"], citation_name, actual_citation, reporter, jurisdiction, year))
+def reporter_lookup(yearReporterPattern, reporterJurisdictionDict):
+    """
+    Memoized extract_reporter_and_year for one pattern and reporter dict, kept
+    per dict like get_reporter_matcher.
+    """
+    key = (yearReporterPattern, id(reporterJurisdictionDict))
+    entry = _reporter_lookups.get(key)
+    if entry is None or entry[0] is not reporterJurisdictionDict:
+        yearReporterRe = re.compile(yearReporterPattern)
+
+        @lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+        def lookup(actual_citation):
+            matchedYearReporter = yearReporterRe.search(actual_citation)
+            reporter = ""
+            year = None
+            reporterJurisdictionVal = ""
+            if matchedYearReporter:
+                reporter = matchedYearReporter.group("rptr1") or matchedYearReporter.group("rptr2")
+                year = matchedYearReporter.group("year1") or matchedYearReporter.group("year2")
+                if year:
+                    year = int(year)
+                reporterJurisdictionVal = reporterJurisdictionDict.get(clean_string(reporter), ["", ""])[1]
+                reporter = reporterJurisdictionDict.get(clean_string(reporter), ["", ""])[0]
+            if not reporter:
+                reporter, reporterJurisdictionVal, matchedYear = get_reporter_matcher(reporterJurisdictionDict).resolve(actual_citation)
+                year = year or matchedYear
+            return reporter, reporterJurisdictionVal, year
+
+        entry = _reporter_lookups[key] = (reporterJurisdictionDict, lookup)
+    return entry[1]
 
 def extract_reporter_and_year(actual_citation, yearReporterPattern, reporterJurisdictionDict):
-    matchedYearReporter = re.search(yearReporterPattern, actual_citation)
-    reporter = ""
-    year = None
-    reporterJurisdictionVal = ""
-    if matchedYearReporter:
-        reporter = matchedYearReporter.group("rptr1") or matchedYearReporter.group("rptr2")
-        year = matchedYearReporter.group("year1") or matchedYearReporter.group("year2")
-        if year:
-            year = int(year)
-        reporterJurisdictionVal = reporterJurisdictionDict.get(clean_string(reporter), ["", ""])[1]
-        reporter = reporterJurisdictionDict.get(clean_string(reporter), ["", ""])[0]
-    return reporter, reporterJurisdictionVal, year
-
-def process_citations(cur, meta, text, new_text, citation_pattern, noNamePattern, yearReporterPattern, reporterJurisdictionDict):
-    matches = re.finditer(citation_pattern, text)
-    noNameMatches = re.finditer(noNamePattern, new_text)
-    flat_list = []
-
-    for citation in matches:
-        citation_name = clean_citation_name(citation.group(1).replace('\n', ' ').strip())
+    return reporter_lookup(yearReporterPattern, reporterJurisdictionDict)(actual_citation)
+
+def citation_row(meta, groups, named, yearReporterPattern, reporterJurisdictionDict):
+    if named:
+        citation_name = clean_citation_name(groups[0].replace('\n', ' ').strip())
         NameList = citation_name.split()[-10:]
         for i in range(len(NameList)):
             if NameList[i][0].isupper():
                 citation_name = " ".join(NameList[i:])
                 break
-        actual_citation = citation.group(2).replace('\n', ' ').strip()
-        if actual_citation == meta["neutral_citation"] or "Text" in citation_name or "Neutral Citation:" in citation_name or "Reported In:" in citation_name:
-            continue
-        for identifier in ["at", "dated", "paragraph", "AT"]:
-            if identifier in actual_citation:
-                actual_citation = actual_citation.split(identifier)[0].strip()
-                break
-        if citation_exists(cur, meta["neutral_citation"] or meta["reported_in"], actual_citation):
+        actual_citation = groups[1].replace('\n', ' ').strip()
+    else:
+        citation_name = ""
+        actual_citation = groups[0].replace('\n', ' ').strip()
+    if actual_citation == meta["neutral_citation"] or "Text" in citation_name or "Neutral Citation:" in citation_name or "Reported In:" in citation_name:
+        return None
+    for identifier in ["at", "dated", "paragraph", "AT"]:
+        if identifier in actual_citation:
+            actual_citation = actual_citation.split(identifier)[0].strip()
+            break
+    reporter, reporterJurisdictionVal, year = extract_reporter_and_year(actual_citation, yearReporterPattern, reporterJurisdictionDict)
+    return citation_name, actual_citation, reporter, reporterJurisdictionVal, year
+
+def scan_citations(meta, text, new_text, citation_pattern, noNamePattern, yearReporterPattern, reporterJurisdictionDict):
+    scanner = get_scanner(citation_pattern, noNamePattern)
+    for groups, named in scanner.scan(text, new_text):
+        row = citation_row(meta, groups, named, yearReporterPattern, reporterJurisdictionDict)
+        if row:
+            yield row
+
+def scan_citations_stream(meta, pages, citation_pattern, noNamePattern, yearReporterPattern, reporterJurisdictionDict):
+    scanner = get_scanner(citation_pattern, noNamePattern)
+    for groups, named in scanner.scan_stream(pages):
+        row = citation_row(meta, groups, named, yearReporterPattern, reporterJurisdictionDict)
+        if row:
+            yield row
+
+def dedup_citation_rows(meta, citation_rows):
+    key = meta["neutral_citation"] or meta["reported_in"]
+    seen = set()
+    for citation_name, actual_citation, reporter, reporterJurisdictionVal, year in citation_rows:
+        normalized_citation = clean_string(actual_citation)
+        if normalized_citation in seen:
             continue
-        reporter, reporterJurisdictionVal, year = extract_reporter_and_year(actual_citation, yearReporterPattern, reporterJurisdictionDict)
-        insert_citation(cur, meta, citation_name, actual_citation, reporter, reporterJurisdictionVal, year)
+        seen.add(normalized_citation)
+        yield key, citation_name, actual_citation, reporter, reporterJurisdictionVal, year, normalized_citation
+
+def list_pdf_files(pdf_folder):
+    pdf_paths = []
+    for root, dirs, files in os.walk(pdf_folder):
+        dirs.sort()
+        for filename in sorted(files):
+            if filename.lower().endswith(".pdf"):
+                pdf_paths.append(os.path.join(root, filename))
+    return pdf_paths
 
-    for citationN in noNameMatches:
-        actual_citationN = citationN.group(1).replace('\n', ' ').strip()
-        citation_nameN = ""
-        if actual_citationN == meta["neutral_citation"] or "Text" in citation_nameN:
+# Worker processes get the reporter dictionary once through the pool initializer
+# instead of having it pickled alongside every PDF path.
+_worker_reporter_dict = None
+
+def _init_worker(reporterJurisdictionDict):
+    global _worker_reporter_dict
+    _worker_reporter_dict = reporterJurisdictionDict
+
+def file_digest(pdf_path):
+    digest = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_manifest(cur):
+    cur.execute("SELECT pdf_path, size, mtime_ns, content_hash, neutral_citation FROM ingest_manifest")
+    return {row[0]: row[1:] for row in cur.fetchall()}
+
+def plan_incremental(cur, pdf_paths):
+    manifest = load_manifest(cur)
+    pending = set()
+    stale_keys = set()
+    for pdf_path in pdf_paths:
+        entry = manifest.get(pdf_path)
+        if entry is None:
+            pending.add(pdf_path)
             continue
-        for identifier in ["at", "dated", "paragraph", "AT"]:
-            if identifier in actual_citationN:
-                actual_citationN = actual_citationN.split(identifier)[0].strip()
-                break
-        if citation_exists(cur, meta["neutral_citation"] or meta["reported_in"], actual_citationN):
+        size, mtime_ns, content_hash, key = entry
+        stat = os.stat(pdf_path)
+        if stat.st_size == size and stat.st_mtime_ns == mtime_ns:
             continue
-        reporter, reporterJurisdictionVal, year = extract_reporter_and_year(actual_citationN, yearReporterPattern, reporterJurisdictionDict)
-        insert_citation(cur, meta, citation_nameN, actual_citationN, reporter, reporterJurisdictionVal, year)
+        if file_digest(pdf_path) == content_hash:
+            cur.execute("UPDATE ingest_manifest SET size = ?, mtime_ns = ? WHERE pdf_path = ?",
+                        (stat.st_size, stat.st_mtime_ns, pdf_path))
+            continue
+        pending.add(pdf_path)
+        if key:
+            stale_keys.add(key)
+
+    # Several PDFs can share one neutral citation (re-downloads across batches) and
+    # their citations are de-duplicated against each other, so when one of them
+    # changes every file that produced that key is re-processed together.
+    if stale_keys:
+        present = set(pdf_paths)
+        for pdf_path, (_, _, _, key) in manifest.items():
+            if key in stale_keys and pdf_path in present:
+                pending.add(pdf_path)
+        for key in stale_keys:
+            cur.execute("DELETE FROM citations WHERE neutral_citation = ?", (key,))
+            cur.execute("DELETE FROM main_paper WHERE neutral_citation = ?", (key,))
+        forget_judgments(cur, stale_keys)
+    for pdf_path in pending:
+        cur.execute("DELETE FROM ingest_manifest WHERE pdf_path = ?", (pdf_path,))
+    return [pdf_path for pdf_path in pdf_paths if pdf_path in pending]
+
+def clear_documents(cur):
+    # A full run re-derives every row from the PDFs, so rows written by an earlier
+    # extractor, or for PDFs no longer in the folder, must not survive it.
+    cur.execute("DELETE FROM ingest_manifest")
+    cur.execute("DELETE FROM citations")
+    cur.execute("DELETE FROM authority")
+    cur.execute("DELETE FROM main_paper")
+    forget_judgments(cur)
+
+def prune_authorities(cur):
+    # Re-processed judgments may have dropped the last citation of an authority.
+    cur.execute("""
+        DELETE FROM authority
+        WHERE NOT EXISTS (SELECT 1 FROM citations c WHERE c.authority_id = authority.authority_id)
+    """)
+
+def parse_pdf_stream(pdf_path, reporterJurisdictionDict, metrics, body_pages=None, seed_meta=None, data=None,
+                     hasher=None):
+    # Page decoding and scanning are interleaved here, so everything after the
+    # header pages is counted as citation time.
+    started = time.perf_counter()
+    with closing(iter_pdf_pages(pdf_path, data)) as pages:
+        header = list(islice(pages, HEADER_PAGES))
+        extracted = time.perf_counter()
+        meta = fill_metadata(extract_metadata(
+            "".join(page[0] for page in header).strip(), "".join(page[1] for page in header)
+        ), seed_meta)
+        parsed = time.perf_counter()
+        citation_rows = []
+        if meta["neutral_citation"] or meta["reported_in"]:
+            pages = chain(header, pages)
+            if body_pages is not None:
+                pages = (body_pages.append(page[0]) or page for page in pages)
+            if hasher is not None:
+                pages = (hasher.update(page[0]) or page for page in pages)
+            citation_rows = list(scan_citations_stream(
+                meta, pages,
+                CITATION_PATTERN, NO_NAME_PATTERN, YEAR_REPORTER_RE, reporterJurisdictionDict
+            ))
+    metrics["extract_seconds"] = extracted - started
+    metrics["metadata_seconds"] = parsed - extracted
+    metrics["citations_seconds"] = time.perf_counter() - parsed
+    return meta, citation_rows
+
+def parse_pdf(pdf_path, reporterJurisdictionDict=None, stream=False, text_cache=None, index_text=False,
+              seed_meta=None, data=None, stat=None, signatures=False):
+    if reporterJurisdictionDict is None:
+        reporterJurisdictionDict = _worker_reporter_dict
+    if stat is None:
+        stat = os.stat(pdf_path)
+    content_hash = hashlib.sha256(data).hexdigest() if data is not None else file_digest(pdf_path)
+    metrics = {}
+    body = None
+    signature = None
+    if stream:
+        body_pages = [] if index_text else None
+        hasher = MinHasher() if signatures else None
+        meta, citation_rows = parse_pdf_stream(
+            pdf_path, reporterJurisdictionDict, metrics, body_pages, seed_meta, data, hasher
+        )
+        if body_pages:
+            body = "".join(body_pages).strip()
+        if hasher is not None and (meta["neutral_citation"] or meta["reported_in"]):
+            signature = hasher.signature()
+    else:
+        started = time.perf_counter()
+        text, new_text = cached_extract_text(pdf_path, content_hash, text_cache, data)
+        extracted = time.perf_counter()
+        meta = fill_metadata(extract_metadata(text, new_text), seed_meta)
+        parsed = time.perf_counter()
+        citation_rows = []
+        if meta["neutral_citation"] or meta["reported_in"]:
+            citation_rows = list(scan_citations(
+                meta, text, new_text,
+                CITATION_PATTERN, NO_NAME_PATTERN, YEAR_REPORTER_RE, reporterJurisdictionDict
+            ))
+        metrics["extract_seconds"] = extracted - started
+        metrics["metadata_seconds"] = parsed - extracted
+        metrics["citations_seconds"] = time.perf_counter() - parsed
+        if index_text:
+            body = text
+        if signatures and (meta["neutral_citation"] or meta["reported_in"]):
+            signature = minhash_signature(text)
+    metrics["citations"] = len(citation_rows)
+    metrics["unresolved_reporters"] = sum(1 for row in citation_rows if not row[2])
+    record = {
+        "pdf_path": pdf_path, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+        "content_hash": content_hash, "meta": meta, "citations": citation_rows, "metrics": metrics,
+    }
+    if body:
+        record["body"] = body
+    if signature:
+        record["signature"] = signature
+    return record
+
+class BulkWriter:
+    def __init__(self, conn, commit_every=50, metrics=None, near_duplicates=None, skip_near_duplicates=False):
+        self.conn = conn
+        self.metrics = metrics
+        self.near_duplicates = near_duplicates
+        self.skip_near_duplicates = skip_near_duplicates
+        self.cur = conn.cursor()
+        self.commit_every = max(1, commit_every)
+        self.main_paper_rows = []
+        self.citation_rows = []
+        self.manifest_rows = []
+        self.text_rows = []
+        self.authority_rows = []
+        self.pending_docs = 0
+        # Authority ids are handed out here, so a batch needs no lookups in the database.
+        self.cur.execute("SELECT normalized_citation, authority_id FROM authority")
+        self.authority_ids = dict(self.cur.fetchall())
+        self.cur.execute("SELECT COALESCE(MAX(authority_id), 0) FROM authority")
+        self.last_authority_id = self.cur.fetchone()[0]
+        # Authorities written in this run: normalized citation -> whether it had a reporter.
+        self.refreshed = {}
+
+    def intern(self, citation_rows):
+        for key, citation_name, actual_citation, reporter, jurisdiction, year, normalized_citation in citation_rows:
+            authority_id = self.authority_ids.get(normalized_citation)
+            new_id = None
+            if authority_id is None:
+                self.last_authority_id += 1
+                authority_id = new_id = self.authority_ids[normalized_citation] = self.last_authority_id
+            # Each authority is written on its first use in a run, so a reprocessed
+            # document updates reporter, jurisdiction and year; a later use that
+            # resolves the reporter where the first did not replaces it.
+            had_reporter = self.refreshed.get(normalized_citation)
+            if had_reporter is None or reporter and not had_reporter:
+                self.refreshed[normalized_citation] = bool(reporter)
+                self.authority_rows.append(
+                    (new_id, normalized_citation, actual_citation, reporter, jurisdiction, year)
+                )
+            yield key, authority_id, citation_name, actual_citation
+
+    def add_record(self, record):
+        meta = record["meta"]
+        key = meta["neutral_citation"] or meta["reported_in"]
+        if key and self.near_duplicates is not None and "signature" in record:
+            key = self.check_near_duplicate(record, key)
+        if key:
+            self.main_paper_rows.append(main_paper_row(meta))
+            buffered = len(self.citation_rows)
+            self.citation_rows.extend(self.intern(dedup_citation_rows(meta, record["citations"])))
+            if "metrics" in record:
+                record["metrics"]["duplicates"] = len(record["citations"]) - (len(self.citation_rows) - buffered)
+            if "body" in record:
+                self.text_rows.append((key, record["body"]))
+        elif not record.get("near_duplicate"):
+            print(f"Skipping {os.path.basename(record['pdf_path'])}: No neutral citation or reported in found.")
+        self.manifest_rows.append(
+            (record["pdf_path"], record["size"], record["mtime_ns"], record["content_hash"], key)
+        )
+        if self.metrics is not None:
+            self.metrics.add(record)
+        self.pending_docs += 1
+        if self.pending_docs >= self.commit_every:
+            self.flush()
 
-def process_pdf_files(pdf_folder, db_path, reporterdbpath):
+    def check_near_duplicate(self, record, key):
+        # Compared against every document written before it, including this run's
+        # earlier records. Returns the key to write under, None to skip the document.
+        match = self.near_duplicates.find(record["signature"])
+        if match is None:
+            self.near_duplicates.add(record["pdf_path"], key, record["signature"])
+            return key
+        name = os.path.basename(record["pdf_path"])
+        self.near_duplicates.flag(record["pdf_path"], key, match, self.skip_near_duplicates)
+        record["near_duplicate"] = match
+        if self.skip_near_duplicates:
+            print(f"Skipping {name}: near-duplicate of {match[1]} ({match[2]:.2f}), {os.path.basename(match[0])}.")
+            return None
+        print(f"Near-duplicate: {name} ({key}) of {match[1]} ({match[2]:.2f}), {os.path.basename(match[0])}.")
+        self.near_duplicates.add(record["pdf_path"], key, record["signature"])
+        return key
+
+    def flush(self):
+        # Documents are written in arrival order and their manifest entries go in the
+        # same transaction, so a crash loses at most the last unflushed batch.
+        started = time.perf_counter()
+        self.cur.executemany(MAIN_PAPER_INSERT, self.main_paper_rows)
+        self.cur.executemany(AUTHORITY_UPSERT, self.authority_rows)
+        self.cur.executemany(CITATION_INSERT, self.citation_rows)
+        self.cur.executemany(MANIFEST_INSERT, self.manifest_rows)
+        if self.text_rows:
+            write_judgment_text(self.cur, self.text_rows)
+        if self.near_duplicates is not None:
+            self.near_duplicates.flush()
+        self.conn.commit()
+        if self.metrics is not None:
+            self.metrics.batch_committed(time.perf_counter() - started)
+        self.main_paper_rows.clear()
+        self.citation_rows.clear()
+        self.authority_rows.clear()
+        self.manifest_rows.clear()
+        self.text_rows.clear()
+        self.pending_docs = 0
+
+def begin_bulk_load(conn, cache_mb=64):
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA cache_size = -{int(cache_mb) * 1024}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+
+def end_bulk_load(conn):
+    conn.execute("ANALYZE")
+    # Fold the WAL back into the main file so the database stays a single file.
+    conn.execute("PRAGMA journal_mode = DELETE")
+
+def _parse_pdf_task(task, data=None, stat=None, **parse_options):
+    pdf_path, seed_meta = task
+    return parse_pdf(pdf_path, seed_meta=seed_meta, data=data, stat=stat, **parse_options)
+
+def pdf_pipeline(reporterJurisdictionDict, workers=1, prefetch=PREFETCH_FILES, prefetch_mb=PREFETCH_MB,
+                 progress_every=None, **parse_options):
+    # Records come back in input order, so the writer inserts rows in exactly the
+    # same sequence whatever the number of workers.
+    if workers <= 1:
+        parse = partial(_parse_pdf_task, reporterJurisdictionDict=reporterJurisdictionDict, **parse_options)
+    else:
+        # Pool workers get the reporter dictionary once through the initializer.
+        parse = partial(_parse_pdf_task, **parse_options)
+    return IngestPipeline(parse, workers, prefetch, prefetch_mb, initializer=_init_worker,
+                          initargs=(reporterJurisdictionDict,), progress_every=progress_every)
+
+def process_pdf_files(pdf_folder, db_path, reporterdbpath, workers=1, incremental=True, commit_every=50, cache_mb=64,
+                      stream=False, text_cache=None, metrics=False, metrics_log=None, search_index=False,
+                      seed_missing=False, reporter_table=REPORTER_TABLE, prefetch=PREFETCH_FILES,
+                      prefetch_mb=PREFETCH_MB, progress=False, near_duplicates=None,
+                      near_duplicate_threshold=None):
     conn = connect_db(db_path)
+    begin_bulk_load(conn, cache_mb)
     cur = conn.cursor()
     create_tables(cur)
-    reporterJurisdictionDict = reporter_jurisdiction_dict(reporterdbpath)
+    # Once a database has a search index, every later run keeps it up to date.
+    # Enabling it on an existing database indexes the stored citation names and
+    # re-processes every PDF once so that their text gets indexed too.
+    if search_enabled(cur):
+        search_index = True
+        create_search_tables(cur)
+    elif search_index:
+        create_search_tables(cur)
+        rebuild_citation_index(cur)
+        incremental = False
+    # near_duplicates is "flag" (write and record them) or "skip". Like the search
+    # index it stays on once a database has signatures, with the mode and threshold
+    # stored in it, and turning it on re-processes every PDF once so that all of
+    # them get a signature. Changing the mode or threshold re-processes them too,
+    # as documents already written were judged under the old settings.
+    if signatures_enabled(cur):
+        stored_mode, stored_threshold = load_settings(cur)
+        near_duplicates = near_duplicates or stored_mode or "flag"
+        near_duplicate_threshold = near_duplicate_threshold or stored_threshold or THRESHOLD
+        if stored_mode is not None and (near_duplicates, near_duplicate_threshold) != (stored_mode, stored_threshold):
+            incremental = False
+    elif near_duplicates:
+        near_duplicate_threshold = near_duplicate_threshold or THRESHOLD
+        incremental = False
+    duplicate_index = None
+    if near_duplicates:
+        # Built before anything is written, so an unusable threshold fails here.
+        duplicate_index = NearDuplicateIndex(cur, near_duplicate_threshold)
+        create_signature_tables(cur)
+        save_settings(cur, near_duplicates, near_duplicate_threshold)
+    rebuild_summaries = create_query_tables(cur)
+    reporterJurisdictionDict = reporter_jurisdiction_dict(reporterdbpath, reporter_table)
 
-    for root, dirs, files in os.walk(pdf_folder):
-        for filename in files:
-            if filename.lower().endswith(".pdf"):
-                pdf_path = os.path.join(root, filename)
-                text, new_text = extract_text_from_pdf(pdf_path)
-                meta = extract_metadata(text, new_text)
-                if meta["neutral_citation"] or meta["reported_in"]:
-                    insert_main_paper(cur, meta)
-                    process_citations(
-                        cur, meta, text, new_text,
-                        CITATION_PATTERN, NO_NAME_PATTERN, YEAR_REPORTER_PATTERN, reporterJurisdictionDict
-                    )
-                    conn.commit()
-                else:
-                    print(f"Skipping {filename}: No neutral citation or reported in found.")
+    # Re-downloads of a document in a later batch are dropped before any PDF is opened.
+    index = DocumentIndex(pdf_folder, list_pdf_files(pdf_folder), load_known_paths(cur))
+    if index.duplicates:
+        print(f"Skipping {len(index.duplicates)} PDF(s) already downloaded in another batch.")
+        cur.executemany("DELETE FROM ingest_manifest WHERE pdf_path = ?", ((pdf_path,) for pdf_path in index.duplicates))
+    save_index(cur, index)
+    pdf_paths = index.pdf_paths
+    if incremental:
+        pdf_paths = plan_incremental(cur, pdf_paths)
+    else:
+        clear_documents(cur)
+        rebuild_summaries = True
+    if near_duplicates:
+        # A re-processed PDF must not match its own earlier signature.
+        forget_signatures(cur, pdf_paths + index.duplicates if incremental else None)
+    conn.commit()
+    print(f"Processing {len(pdf_paths)} PDF file(s).")
+
+    recorder = None
+    if metrics or metrics_log:
+        recorder = MetricsRecorder(conn if metrics else None, metrics_log)
+    writer = BulkWriter(conn, commit_every, recorder, duplicate_index, near_duplicates == "skip")
+    tasks = []
+    for pdf_path in pdf_paths:
+        entry = index.entry_for(pdf_path)
+        tasks.append((pdf_path, contents_metadata(entry) if entry is not None else None))
+    pipeline = pdf_pipeline(reporterJurisdictionDict, workers, prefetch, prefetch_mb,
+                            progress_every=PROGRESS_SECONDS if progress else None,
+                            stream=stream, text_cache=text_cache, index_text=search_index,
+                            signatures=bool(near_duplicates))
+    pipeline.run(tasks, writer.add_record)
+    writer.flush()
+    prune_authorities(cur)
+    if seed_missing:
+        seed_rows = [main_paper_row(contents_metadata(entry)) for entry in index.missing_entries()]
+        cur.executemany(MAIN_PAPER_SEED, [row for row in seed_rows if row[0]])
+    refresh_summaries(cur, full=rebuild_summaries)
+    conn.commit()
+    end_bulk_load(conn)
     conn.close()
+    if recorder is not None:
+        recorder.print_summary()
+    if progress:
+        pipeline.print_summary()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Extract judgment metadata and citations from PDFs into SQLite.")
+    parser.add_argument("--pdf-folder", default=PDF_FOLDER)
+    parser.add_argument("--db-path", default=DB_PATH)
+    parser.add_argument("--reporter-db", default=REPORTER_DB_PATH)
+    parser.add_argument("--reporter-table", default=REPORTER_TABLE,
+                        help=f"reporter table of the jurisdiction in the reporter database (default: {REPORTER_TABLE})")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of worker processes for PDF parsing (default: 1, serial)")
+    parser.add_argument("--full", action="store_true",
+                        help="ignore the ingest manifest, drop the stored judgments and citations "
+                             "and re-process every PDF")
+    parser.add_argument("--prefetch", type=int, default=PREFETCH_FILES,
+                        help=f"PDFs read ahead of the parse stage (default: {PREFETCH_FILES})")
+    parser.add_argument("--prefetch-mb", type=int, default=PREFETCH_MB,
+                        help=f"cap on PDF bytes read but not yet written, in MiB (default: {PREFETCH_MB})")
+    parser.add_argument("--progress", action="store_true",
+                        help="print pipeline progress and per-stage throughput")
+    parser.add_argument("--commit-every", type=int, default=50,
+                        help="number of documents per write transaction (default: 50)")
+    parser.add_argument("--cache-mb", type=int, default=64,
+                        help="SQLite page cache size during the bulk load, in MiB (default: 64)")
+    parser.add_argument("--stream", action="store_true",
+                        help="extract and scan PDFs page by page instead of decoding whole documents")
+    parser.add_argument("--text-cache-dir", default=TEXT_CACHE_DIR,
+                        help=f"directory of the extracted-text cache (default: {TEXT_CACHE_DIR})")
+    parser.add_argument("--text-cache-mb", type=int, default=TEXT_CACHE_MAX_MB,
+                        help=f"size cap of the extracted-text cache in MiB (default: {TEXT_CACHE_MAX_MB})")
+    parser.add_argument("--no-text-cache", action="store_true",
+                        help="always decode PDFs, bypassing the extracted-text cache")
+    parser.add_argument("--clear-text-cache", action="store_true",
+                        help="empty the extracted-text cache before running")
+    parser.add_argument("--metrics", action="store_true",
+                        help="record per-document stage timings and counters in the ingestion_metrics table")
+    parser.add_argument("--metrics-log", default=None,
+                        help="also append per-document metrics to this JSON lines file")
+    parser.add_argument("--seed-missing", action="store_true",
+                        help="add main_paper rows for documents listed in the contents files but not downloaded")
+    parser.add_argument("--fts", action="store_true",
+                        help="maintain the FTS5 search index over judgment text and citation names (see search.py)")
+    parser.add_argument("--near-duplicates", choices=["flag", "skip"], default=None,
+                        help="detect near-identical judgments by MinHash/LSH and write them anyway (flag) or skip them; "
+                             "the mode is stored and stays on once a database has signatures (see near_duplicates.py)")
+    parser.add_argument("--near-duplicate-threshold", type=float, default=None,
+                        help="estimated Jaccard similarity of word shingles counted as near-identical "
+                             f"(default: the stored threshold, else {THRESHOLD})")
+    args = parser.parse_args(argv)
+    if args.near_duplicate_threshold is not None:
+        try:
+            banding(args.near_duplicate_threshold)
+        except ValueError as error:
+            parser.error(str(error))
+    return args
 
 if __name__ == "__main__":
-    process_pdf_files(PDF_FOLDER, DB_PATH, REPORTER_DB_PATH)
\ No newline at end of file
+    args = parse_args()
+    text_cache = TextCache(args.text_cache_dir, args.text_cache_mb * 1024 * 1024)
+    if args.clear_text_cache:
+        text_cache.clear()
+    else:
+        text_cache.evict()
+    if args.no_text_cache:
+        text_cache = None
+    process_pdf_files(args.pdf_folder, args.db_path, args.reporter_db,
+                      workers=args.workers, incremental=not args.full,
+                      commit_every=args.commit_every, cache_mb=args.cache_mb, stream=args.stream,
+                      text_cache=text_cache, metrics=args.metrics, metrics_log=args.metrics_log,
+                      search_index=args.fts, seed_missing=args.seed_missing,
+                      reporter_table=args.reporter_table, prefetch=args.prefetch,
+                      prefetch_mb=args.prefetch_mb, progress=args.progress,
+                      near_duplicates=args.near_duplicates, near_duplicate_threshold=args.near_duplicate_threshold)
@@ -1,66 +1,189 @@
-import pandas as pd
+import os
+import sys
+import argparse
 import sqlite3
-import string
 
-# Step 1: Load Excel file
-df = pd.read_excel("Jersey_reporters.xlsx")
+import pandas as pd
+
+REPORTER_XLSX = "Jersey_reporters.xlsx"
+REPORTER_DB_PATH = "Reporters.db"
+REPORTER_TABLE = "jersey_reporters"
+SPELLINGS_TABLE = "reporter_spellings"
+
+# Same characters clean_reporter used to drop: , . : ; | ( ) [ ] and whitespace.
+REPORTER_STRIP_PATTERN = r"[,.:;|()\[\]\s]"
+
 
-# Step 2: Clean and fill missing data
-df["Need to Check"] = df["Need to Check"].fillna("UNKNOWN").astype(str).str.strip()
-df["Jurisdiction"] = df["Jurisdiction"].fillna("UNKNOWN").astype(str).str.strip()
-df["Reporter"] = df["Reporter"].fillna("").astype(str)
+def load_spreadsheet(path):
+    # Step 1: Load Excel file
+    df = pd.read_excel(path)
 
-# Step 3: Clean reporter (same as SQL LOWER(REPLACE...))
-def clean_reporter(text):
-    return ''.join(c.strip() for c in text.lower() if c not in [',','.',':',';','|','(',')','[',']'] and not c.isspace())
+    # Step 2: Clean and fill missing data
+    df["Need to Check"] = df["Need to Check"].fillna("UNKNOWN").astype(str).str.strip()
+    df["Jurisdiction"] = df["Jurisdiction"].fillna("UNKNOWN").astype(str).str.strip()
+    df["Reporter"] = df["Reporter"].fillna("").astype(str)
 
-df["Reporter_cleaned"] = df["Reporter"].apply(clean_reporter)
+    # Step 3: Clean reporter (same as SQL LOWER(REPLACE...))
+    df["Reporter_cleaned"] = df["Reporter"].str.lower().str.replace(REPORTER_STRIP_PATTERN, "", regex=True)
+    df["Count"] = pd.to_numeric(df["Count"], errors="coerce").fillna(0).astype(int)
+    # The full path, so two spreadsheets with the same file name stay apart.
+    df["Source"] = os.path.abspath(path)
+    return df.rename(columns={"Need to Check": "NeedToCheck"})[
+        ["Source", "Reporter", "Reporter_cleaned", "Count", "Jurisdiction", "NeedToCheck"]
+    ]
 
-# Step 4: Group by (Reporter, Jurisdiction, NeedToCheck), sum Count
-df["Count"] = pd.to_numeric(df["Count"], errors="coerce").fillna(0).astype(int)
 
-print(f"Total unique reporters: {df['Reporter_cleaned'].nunique()}")
+def pick_reporters(df):
+    # Step 4: For each cleaned reporter keep its most common spelling (the first
+    # one on ties) and give it the total count of all spellings.
+    df = df.reset_index(drop=True)
+    best = df.loc[df.groupby("Reporter_cleaned", sort=True)["Count"].idxmax()]
+    totals = df.groupby("Reporter_cleaned")["Count"].sum().rename("Total")
+    return best.merge(totals, left_on="Reporter_cleaned", right_index=True, how="left")
 
-df_max = (
-    df.groupby("Reporter_cleaned", group_keys=False)
-    .apply(lambda g: g.loc[g["Count"] == g["Count"].max()].iloc[0])
-    .reset_index(drop=True)
-)
 
+def create_tables(cur, table=REPORTER_TABLE):
+    cur.execute(f"""
+    CREATE TABLE IF NOT EXISTS {table} (
+        Reporter TEXT,
+        Reporter_cleaned TEXT,
+        Count INTEGER,
+        Jurisdiction TEXT,
+        NeedToCheck TEXT,
+        PRIMARY KEY (Reporter, Jurisdiction, NeedToCheck)
+    )
+    """)
+    cur.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_cleaned ON {table} (Reporter_cleaned)")
+    # Per-spreadsheet counts for every spelling, so a later spreadsheet can be
+    # merged in without re-reading the earlier ones.
+    cur.execute(f"""
+    CREATE TABLE IF NOT EXISTS {SPELLINGS_TABLE} (
+        ReporterTable TEXT,
+        Source TEXT,
+        Reporter TEXT,
+        Reporter_cleaned TEXT,
+        Count INTEGER,
+        Jurisdiction TEXT,
+        NeedToCheck TEXT,
+        PRIMARY KEY (ReporterTable, Source, Reporter, Jurisdiction, NeedToCheck)
+    )
+    """)
 
-secTable = df.groupby(["Reporter_cleaned"]).agg({"Count": "sum"}).reset_index()
 
-result = pd.merge(df_max, secTable, on=["Reporter_cleaned"], how="left")
-conn = sqlite3.connect("Reporters.db")
-cur = conn.cursor()
+def spelling_rows(df, table):
+    summed = df.groupby(
+        ["Source", "Reporter", "Jurisdiction", "NeedToCheck"], sort=False, as_index=False
+    ).agg(Reporter_cleaned=("Reporter_cleaned", "first"), Count=("Count", "sum"))
+    return [
+        (table, source, reporter, cleaned, int(count), jurisdiction, need_to_check)
+        for source, reporter, jurisdiction, need_to_check, cleaned, count in summed.itertuples(index=False)
+    ]
 
-# Step 8: Create table if not exists
-cur.execute("""
-CREATE TABLE IF NOT EXISTS jersey_reporters (
-    Reporter TEXT,
-    Reporter_cleaned TEXT,
-    Count INTEGER,
-    Jurisdiction TEXT,
-    NeedToCheck TEXT,
-    PRIMARY KEY (Reporter, Jurisdiction, NeedToCheck)
-)
-""")
 
-# Step 9: Insert the data
-for _, row in result.iterrows():
-    cur.execute("""
-        INSERT OR REPLACE INTO jersey_reporters (
+def reporter_rows(result):
+    return [
+        (reporter, cleaned, int(total), jurisdiction, need_to_check)
+        for reporter, cleaned, total, jurisdiction, need_to_check in result[
+            ["Reporter", "Reporter_cleaned", "Total", "Jurisdiction", "NeedToCheck"]
+        ].itertuples(index=False)
+    ]
+
+
+def write_reporters(cur, table, result):
+    cur.executemany(f"""
+        INSERT OR REPLACE INTO {table} (
             Reporter, Reporter_cleaned, Count, Jurisdiction, NeedToCheck
         ) VALUES (?, ?, ?, ?, ?)
-    """, (
-        row["Reporter"],
-        row["Reporter_cleaned"],
-        int(row["Count_y"]),
-        row["Jurisdiction"],
-        row["Need to Check"]
-    ))
-
-conn.commit()
-conn.close()
-
-print(f"Inserted {len(result)} rows into jersey_reporters.")
+    """, reporter_rows(result))
+
+
+def write_spellings(cur, rows):
+    cur.executemany(f"""
+        INSERT OR REPLACE INTO {SPELLINGS_TABLE} (
+            ReporterTable, Source, Reporter, Reporter_cleaned, Count, Jurisdiction, NeedToCheck
+        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+
+
+def require_spellings(cur, table):
+    # Tables built before reporter_spellings existed only hold merged totals,
+    # which cannot be told apart from the spreadsheet being merged in.
+    cur.execute(f"SELECT EXISTS (SELECT 1 FROM {table})")
+    has_reporters = cur.fetchone()[0]
+    cur.execute(f"SELECT EXISTS (SELECT 1 FROM {SPELLINGS_TABLE} WHERE ReporterTable = ?)", (table,))
+    if has_reporters and not cur.fetchone()[0]:
+        raise ValueError(
+            f"{table} has no per-spreadsheet counts to merge into; "
+            "rebuild it once without --merge, listing every spreadsheet."
+        )
+
+
+def rebuild(conn, table, spreadsheets):
+    df = pd.concat([load_spreadsheet(path) for path in spreadsheets], ignore_index=True)
+    print(f"Total unique reporters: {df['Reporter_cleaned'].nunique()}")
+    result = pick_reporters(df)
+    cur = conn.cursor()
+    create_tables(cur, table)
+    cur.execute(f"DELETE FROM {table}")
+    cur.execute(f"DELETE FROM {SPELLINGS_TABLE} WHERE ReporterTable = ?", (table,))
+    write_reporters(cur, table, result)
+    write_spellings(cur, spelling_rows(df, table))
+    conn.commit()
+    return len(result)
+
+
+def merge(conn, table, spreadsheets):
+    df = pd.concat([load_spreadsheet(path) for path in spreadsheets], ignore_index=True)
+    cur = conn.cursor()
+    create_tables(cur, table)
+    require_spellings(cur, table)
+    # Re-merging a spreadsheet replaces its earlier counts instead of adding to them.
+    cur.executemany(
+        f"DELETE FROM {SPELLINGS_TABLE} WHERE ReporterTable = ? AND Source = ?",
+        [(table, source) for source in df["Source"].unique()],
+    )
+    write_spellings(cur, spelling_rows(df, table))
+
+    # Only reporters the new spreadsheets touch are re-picked and rewritten.
+    touched = sorted(df["Reporter_cleaned"].unique())
+    cur.execute("CREATE TEMP TABLE IF NOT EXISTS touched_reporters (Reporter_cleaned TEXT PRIMARY KEY)")
+    cur.execute("DELETE FROM touched_reporters")
+    cur.executemany("INSERT OR IGNORE INTO touched_reporters VALUES (?)", [(key,) for key in touched])
+    spellings = pd.read_sql_query(f"""
+        SELECT Reporter, Reporter_cleaned, Count, Jurisdiction, NeedToCheck FROM {SPELLINGS_TABLE}
+        WHERE ReporterTable = ? AND Reporter_cleaned IN (SELECT Reporter_cleaned FROM touched_reporters)
+        ORDER BY rowid
+    """, conn, params=(table,))
+    result = pick_reporters(spellings)
+    cur.execute(f"""
+        DELETE FROM {table} WHERE Reporter_cleaned IN (SELECT Reporter_cleaned FROM touched_reporters)
+    """)
+    write_reporters(cur, table, result)
+    conn.commit()
+    return len(result)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the reporter lookup table from reporter spreadsheets.")
+    parser.add_argument("spreadsheets", nargs="*", default=[REPORTER_XLSX])
+    parser.add_argument("--db-path", default=REPORTER_DB_PATH)
+    parser.add_argument("--table", default=REPORTER_TABLE)
+    parser.add_argument("--merge", action="store_true",
+                        help="merge the spreadsheets into the existing table instead of rebuilding it")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    conn = sqlite3.connect(args.db_path)
+    if args.merge:
+        try:
+            count = merge(conn, args.table, args.spreadsheets)
+        except ValueError as error:
+            conn.close()
+            sys.exit(str(error))
+        print(f"Merged {count} reporters into {args.table}.")
+    else:
+        count = rebuild(conn, args.table, args.spreadsheets)
+        print(f"Inserted {count} rows into {args.table}.")
+    conn.close()
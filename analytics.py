@@ -0,0 +1,328 @@
+import argparse
+import sqlite3
+from collections import OrderedDict
+
+DB_PATH = "Jersey.db"
+QUERY_CACHE_SIZE = 256
+
+JUDGMENT_YEAR = "substr(judgment_date, 1, 4)"
+
+
+def create_query_tables(cur):
+    """
+    Creates the covering indexes for the reporter/jurisdiction/year and
+    court/date reports, the summary tables, and the triggers that record which
+    summary groups an ingestion run touched. Returns True if the summaries were
+    newly created and need a full refresh.
+    """
+    cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'reporter_year_summary'")
+    created = cur.fetchone() is None
+
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_citations_neutral ON citations (neutral_citation)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_citations_authority ON citations (authority_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_authority_reporter_year ON authority (reporter, jurisdiction, year)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_authority_jurisdiction_year ON authority (jurisdiction, year, reporter)")
+    cur.execute(f"CREATE INDEX IF NOT EXISTS idx_main_paper_court_year ON main_paper (court, {JUDGMENT_YEAR})")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_main_paper_court_date ON main_paper (court, judgment_date)")
+
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS reporter_year_summary (
+        reporter TEXT,
+        jurisdiction TEXT,
+        year INTEGER,
+        citations INTEGER
+    )
+    """)
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_reporter_year_summary
+    ON reporter_year_summary (reporter, jurisdiction, year)
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS court_year_summary (
+        court TEXT,
+        year TEXT,
+        judgments INTEGER,
+        citations INTEGER
+    )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_court_year_summary ON court_year_summary (court, year)")
+
+    # Groups whose counts may have changed since the last refresh.
+    cur.execute("CREATE TABLE IF NOT EXISTS reporter_year_dirty (reporter TEXT, jurisdiction TEXT, year INTEGER)")
+    cur.execute("CREATE TABLE IF NOT EXISTS court_year_dirty (court TEXT, year TEXT)")
+    for event, row in (("INSERT", "new"), ("DELETE", "old")):
+        cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS citations_summary_{event.lower()} AFTER {event} ON citations BEGIN
+            INSERT INTO reporter_year_dirty
+            SELECT reporter, jurisdiction, year FROM authority WHERE authority_id = {row}.authority_id;
+            INSERT INTO court_year_dirty
+            SELECT court, {JUDGMENT_YEAR} FROM main_paper WHERE neutral_citation = {row}.neutral_citation;
+        END
+        """)
+        cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS main_paper_summary_{event.lower()} AFTER {event} ON main_paper BEGIN
+            INSERT INTO court_year_dirty VALUES ({row}.court, substr({row}.judgment_date, 1, 4));
+        END
+        """)
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS citations_summary_update
+    AFTER UPDATE OF authority_id ON citations BEGIN
+        INSERT INTO reporter_year_dirty
+        SELECT reporter, jurisdiction, year FROM authority WHERE authority_id IN (old.authority_id, new.authority_id);
+    END
+    """)
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS authority_summary_update
+    AFTER UPDATE OF reporter, jurisdiction, year ON authority BEGIN
+        INSERT INTO reporter_year_dirty VALUES (old.reporter, old.jurisdiction, old.year);
+        INSERT INTO reporter_year_dirty VALUES (new.reporter, new.jurisdiction, new.year);
+    END
+    """)
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS main_paper_summary_update
+    AFTER UPDATE OF court, judgment_date ON main_paper BEGIN
+        INSERT INTO court_year_dirty VALUES (old.court, substr(old.judgment_date, 1, 4));
+        INSERT INTO court_year_dirty VALUES (new.court, substr(new.judgment_date, 1, 4));
+    END
+    """)
+    # INSERT OR REPLACE removes the old row without firing the delete trigger.
+    cur.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS main_paper_summary_replace BEFORE INSERT ON main_paper BEGIN
+        INSERT INTO court_year_dirty
+        SELECT court, {JUDGMENT_YEAR} FROM main_paper WHERE neutral_citation = new.neutral_citation;
+    END
+    """)
+    return created
+
+
+def refresh_summaries(cur, full=False):
+    """
+    Recounts the summary groups touched since the last refresh (every group if
+    full is set) and returns how many groups were recounted.
+    """
+    if full:
+        cur.execute("DELETE FROM reporter_year_dirty")
+        cur.execute("DELETE FROM court_year_dirty")
+        cur.execute("""
+            INSERT INTO reporter_year_dirty
+            SELECT DISTINCT a.reporter, a.jurisdiction, a.year
+            FROM authority a WHERE EXISTS (SELECT 1 FROM citations c WHERE c.authority_id = a.authority_id)
+        """)
+        cur.execute(f"INSERT INTO court_year_dirty SELECT DISTINCT court, {JUDGMENT_YEAR} FROM main_paper")
+        cur.execute("DELETE FROM reporter_year_summary")
+        cur.execute("DELETE FROM court_year_summary")
+
+    cur.execute("CREATE TEMP TABLE IF NOT EXISTS reporter_year_groups (reporter TEXT, jurisdiction TEXT, year INTEGER)")
+    cur.execute("CREATE TEMP TABLE IF NOT EXISTS court_year_groups (court TEXT, year TEXT)")
+    cur.execute("DELETE FROM reporter_year_groups")
+    cur.execute("DELETE FROM court_year_groups")
+    cur.execute("INSERT INTO reporter_year_groups SELECT DISTINCT reporter, jurisdiction, year FROM reporter_year_dirty")
+    cur.execute("INSERT INTO court_year_groups SELECT DISTINCT court, year FROM court_year_dirty")
+    cur.execute("DELETE FROM reporter_year_dirty")
+    cur.execute("DELETE FROM court_year_dirty")
+
+    cur.execute("""
+        DELETE FROM reporter_year_summary WHERE EXISTS (
+            SELECT 1 FROM reporter_year_groups g
+            WHERE g.reporter IS reporter_year_summary.reporter
+              AND g.jurisdiction IS reporter_year_summary.jurisdiction
+              AND g.year IS reporter_year_summary.year
+        )
+    """)
+    cur.execute("""
+        INSERT INTO reporter_year_summary (reporter, jurisdiction, year, citations)
+        SELECT g.reporter, g.jurisdiction, g.year, COUNT(*)
+        FROM reporter_year_groups g
+        JOIN authority a ON a.reporter IS g.reporter AND a.jurisdiction IS g.jurisdiction AND a.year IS g.year
+        JOIN citations c ON c.authority_id = a.authority_id
+        GROUP BY g.reporter, g.jurisdiction, g.year
+    """)
+    cur.execute("""
+        DELETE FROM court_year_summary WHERE EXISTS (
+            SELECT 1 FROM court_year_groups g
+            WHERE g.court IS court_year_summary.court AND g.year IS court_year_summary.year
+        )
+    """)
+    cur.execute(f"""
+        INSERT INTO court_year_summary (court, year, judgments, citations)
+        SELECT g.court, g.year, COUNT(DISTINCT m.neutral_citation), COUNT(c.rowid)
+        FROM court_year_groups g
+        JOIN main_paper m ON m.court IS g.court AND {JUDGMENT_YEAR} IS g.year
+        LEFT JOIN citations c ON c.neutral_citation = m.neutral_citation
+        GROUP BY g.court, g.year
+    """)
+    cur.execute("SELECT (SELECT COUNT(*) FROM reporter_year_groups) + (SELECT COUNT(*) FROM court_year_groups)")
+    return cur.fetchone()[0]
+
+
+def year_filter(column, year_from, year_to, params):
+    clauses = []
+    if year_from is not None:
+        clauses.append(f"{column} >= ?")
+        params.append(year_from)
+    if year_to is not None:
+        clauses.append(f"{column} <= ?")
+        params.append(year_to)
+    return clauses
+
+
+class CitationAnalytics:
+    """
+    Read side of the summary tables. Query results are kept in an LRU cache
+    that is dropped whenever another connection has committed to the database
+    (PRAGMA data_version), i.e. after every ingestion batch.
+    """
+
+    def __init__(self, db_path=DB_PATH, cache_size=QUERY_CACHE_SIZE):
+        self.conn = sqlite3.connect(db_path)
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.data_version = None
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        self.conn.close()
+
+    def invalidate(self):
+        self.cache.clear()
+
+    def query(self, sql, params=()):
+        data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version != self.data_version:
+            self.data_version = data_version
+            self.invalidate()
+        key = (sql, tuple(params))
+        rows = self.cache.get(key)
+        if rows is not None:
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return rows
+        self.misses += 1
+        rows = self.conn.execute(sql, key[1]).fetchall()
+        self.cache[key] = rows
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return rows
+
+    def refresh(self, full=False):
+        cur = self.conn.cursor()
+        full = create_query_tables(cur) or full
+        groups = refresh_summaries(cur, full)
+        self.conn.commit()
+        # Our own commits do not move data_version for this connection.
+        self.invalidate()
+        return groups
+
+    def citations_by_reporter_year(self, reporter=None, jurisdiction=None, year_from=None, year_to=None):
+        params = []
+        clauses = year_filter("year", year_from, year_to, params)
+        if reporter is not None:
+            clauses.append("reporter = ?")
+            params.append(reporter)
+        if jurisdiction is not None:
+            clauses.append("jurisdiction = ?")
+            params.append(jurisdiction)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self.query(f"""
+            SELECT reporter, jurisdiction, year, citations FROM reporter_year_summary {where}
+            ORDER BY reporter, jurisdiction, year
+        """, params)
+
+    def citations_by_jurisdiction_year(self, year_from=None, year_to=None):
+        params = []
+        clauses = year_filter("year", year_from, year_to, params)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self.query(f"""
+            SELECT jurisdiction, year, SUM(citations) FROM reporter_year_summary {where}
+            GROUP BY jurisdiction, year ORDER BY jurisdiction, year
+        """, params)
+
+    def top_reporters(self, n=10, year_from=None, year_to=None):
+        params = []
+        clauses = year_filter("year", year_from, year_to, params)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self.query(f"""
+            SELECT reporter, jurisdiction, SUM(citations) AS total FROM reporter_year_summary {where}
+            GROUP BY reporter, jurisdiction ORDER BY total DESC, reporter LIMIT ?
+        """, params + [n])
+
+    def top_authorities(self, n=10, reporter=None):
+        """Most cited authorities, counted per authority id over idx_citations_authority."""
+        params = []
+        where = ""
+        if reporter is not None:
+            where = "WHERE a.reporter = ?"
+            params.append(reporter)
+        return self.query(f"""
+            SELECT a.citation, a.reporter, a.year, t.total FROM (
+                SELECT authority_id, COUNT(*) AS total FROM citations GROUP BY authority_id
+            ) t JOIN authority a ON a.authority_id = t.authority_id {where}
+            ORDER BY t.total DESC, a.normalized_citation LIMIT ?
+        """, params + [n])
+
+    def judgments_by_court_year(self, court=None, year_from=None, year_to=None):
+        params = []
+        clauses = year_filter("year", year_from and str(year_from), year_to and str(year_to), params)
+        if court is not None:
+            clauses.append("court = ?")
+            params.append(court)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self.query(f"""
+            SELECT court, year, judgments, citations FROM court_year_summary {where}
+            ORDER BY court, year
+        """, params)
+
+    def judgments_between(self, court, date_from, date_to):
+        """Judgments of one court decided between two ISO dates, served by idx_main_paper_court_date."""
+        return self.query("""
+            SELECT neutral_citation, judgment_date, name FROM main_paper
+            WHERE court = ? AND judgment_date BETWEEN ? AND ?
+            ORDER BY judgment_date, neutral_citation
+        """, (court, date_from, date_to))
+
+
+def print_rows(rows):
+    for row in rows:
+        print("  ".join("" if value is None else str(value) for value in row))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Reporter, jurisdiction and court reports over the citation database.")
+    parser.add_argument("--db-path", default=DB_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    refresh = commands.add_parser("refresh", help="bring the summary tables up to date")
+    refresh.add_argument("--full", action="store_true", help="recount every group instead of the changed ones")
+    reporters = commands.add_parser("reporters", help="citations per reporter per year")
+    reporters.add_argument("--reporter")
+    reporters.add_argument("--jurisdiction")
+    jurisdictions = commands.add_parser("jurisdictions", help="citations per jurisdiction per year")
+    top = commands.add_parser("top-reporters", help="most cited reporters")
+    top.add_argument("-n", type=int, default=10)
+    authorities = commands.add_parser("top-authorities", help="most cited authorities")
+    authorities.add_argument("-n", type=int, default=10)
+    authorities.add_argument("--reporter")
+    courts = commands.add_parser("courts", help="judgments and citations per court per year")
+    courts.add_argument("--court")
+    for command in (reporters, jurisdictions, top, courts):
+        command.add_argument("--year-from", type=int)
+        command.add_argument("--year-to", type=int)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    analytics = CitationAnalytics(args.db_path)
+    if args.command == "refresh":
+        print(f"Recounted {analytics.refresh(args.full)} summary group(s).")
+    elif args.command == "reporters":
+        print_rows(analytics.citations_by_reporter_year(args.reporter, args.jurisdiction, args.year_from, args.year_to))
+    elif args.command == "jurisdictions":
+        print_rows(analytics.citations_by_jurisdiction_year(args.year_from, args.year_to))
+    elif args.command == "top-reporters":
+        print_rows(analytics.top_reporters(args.n, args.year_from, args.year_to))
+    elif args.command == "top-authorities":
+        print_rows(analytics.top_authorities(args.n, args.reporter))
+    elif args.command == "courts":
+        print_rows(analytics.judgments_by_court_year(args.court, args.year_from, args.year_to))
+    analytics.close()
@@ -0,0 +1,239 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import resource
+import tempfile
+import subprocess
+from multiprocessing import get_context
+from datetime import datetime, timezone
+
+import fitz
+import Modularized as M
+from citation_scanner import get_scanner
+
+BENCH_OUTPUT = "bench_results.jsonl"
+STAGES = ("hash", "decode", "metadata", "scan", "resolve", "write")
+
+SYNTHETIC_REPORTERS = ["JLR", "JRC", "JCA", "AC", "WLR", "Ch", "QB", "All ER", "EWCA Civ", "EWHC", "P", "JJ"]
+SYNTHETIC_WORDS = (
+    "the court trustee settlor beneficiary application discretion held that and of in was to "
+    "representation appeal judgment evidence principle authority jurisdiction order costs "
+    "Royal Law whether respect question consider submitted plaintiff defendant"
+).split()
+SYNTHETIC_PARTIES = (
+    "Smith Jones Brown Trustees Holdings Bank Hambros Minerva Abacus Belgrove Vistra Ocorian "
+    "Representation Attorney General Treasurer Settlement Trust Limited Company"
+).split()
+LINES_PER_PAGE = 60
+
+
+def synthetic_citation(rng):
+    year = rng.randint(1950, 2024)
+    reporter = rng.choice(SYNTHETIC_REPORTERS)
+    name = f"{rng.choice(SYNTHETIC_PARTIES)} v {rng.choice(SYNTHETIC_PARTIES)}"
+    volume = f"{rng.randint(1, 4)} " if rng.random() < 0.3 else ""
+    if rng.random() < 0.5:
+        return f"{name} [{year}] {volume}{reporter} {rng.randint(1, 999)}"
+    return f"{name} ({year}) {volume}{reporter} {rng.randint(1, 999)}"
+
+
+def synthetic_header(rng, index):
+    year = rng.randint(2000, 2024)
+    name = f"{rng.choice(SYNTHETIC_PARTIES)} v {rng.choice(SYNTHETIC_PARTIES)} {index}"
+    return [
+        "Copyright vLex. Otherwise, distribution or reproduction is not permitted",
+        name,
+        "Jurisdiction: Jersey",
+        "Judge: Sir Synthetic Bailiff",
+        f"Judgment Date: {rng.randint(1, 28):02d} June {year}",
+        f"Neutral Citation: [{year}] JRC {index}",
+        f"Reported In: [{year}] JRC {index}",
+        "Court: Royal Court",
+        f"Date: {rng.randint(1, 28):02d} June {year}",
+        f"vLex Document Id: VLEX-{900000000 + index}",
+        f"Link: https://justis.vlex.com/vid/synthetic-{900000000 + index}",
+        "Text",
+    ]
+
+
+def generate_synthetic_corpus(out_dir, docs=50, pages=10, citations_per_page=5, seed=0):
+    rng = random.Random(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    pdf_paths = []
+    for index in range(docs):
+        doc = fitz.open()
+        for page_no in range(pages):
+            lines = synthetic_header(rng, index) if page_no == 0 else []
+            citation_lines = set(rng.sample(range(len(lines), LINES_PER_PAGE), min(citations_per_page, LINES_PER_PAGE - len(lines))))
+            for line_no in range(len(lines), LINES_PER_PAGE):
+                words = " ".join(rng.choice(SYNTHETIC_WORDS) for _ in range(rng.randint(6, 12)))
+                if line_no in citation_lines:
+                    words = f"{words}, see {synthetic_citation(rng)}."
+                lines.append(words)
+            page = doc.new_page()
+            page.insert_text((36, 36), "\n".join(lines), fontsize=7)
+        pdf_path = os.path.join(out_dir, f"Synthetic-Judgment-{index:06d}.pdf")
+        doc.save(pdf_path)
+        doc.close()
+        pdf_paths.append(pdf_path)
+    return pdf_paths
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KiB on Linux and bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def benchmark_corpus(label, pdf_paths, reporterJurisdictionDict, commit_every=50):
+    timings = dict.fromkeys(STAGES, 0.0)
+    matches = candidate_rows = 0
+    scanner = get_scanner(M.CITATION_PATTERN, M.NO_NAME_PATTERN)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        conn = M.connect_db(os.path.join(tmp_dir, "bench.db"))
+        M.begin_bulk_load(conn)
+        M.create_tables(conn.cursor())
+        writer = M.BulkWriter(conn, commit_every)
+        started = time.perf_counter()
+        for pdf_path in pdf_paths:
+            t0 = time.perf_counter()
+            stat = os.stat(pdf_path)
+            content_hash = M.file_digest(pdf_path)
+            t1 = time.perf_counter()
+            text, new_text = M.extract_text_from_pdf(pdf_path)
+            t2 = time.perf_counter()
+            meta = M.extract_metadata(text, new_text)
+            t3 = time.perf_counter()
+            groups = list(scanner.scan(text, new_text)) if (meta["neutral_citation"] or meta["reported_in"]) else []
+            t4 = time.perf_counter()
+            rows = []
+            for group, named in groups:
+                row = M.citation_row(meta, group, named, M.YEAR_REPORTER_RE, reporterJurisdictionDict)
+                if row:
+                    rows.append(row)
+            t5 = time.perf_counter()
+            writer.add_record({
+                "pdf_path": pdf_path, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                "content_hash": content_hash, "meta": meta, "citations": rows,
+            })
+            t6 = time.perf_counter()
+            for stage, elapsed in zip(STAGES[:5], (t1 - t0, t2 - t1, t3 - t2, t4 - t3, t5 - t4)):
+                timings[stage] += elapsed
+            timings["write"] += t6 - t5
+            matches += len(groups)
+            candidate_rows += len(rows)
+        t0 = time.perf_counter()
+        writer.flush()
+        M.end_bulk_load(conn)
+        timings["write"] += time.perf_counter() - t0
+        total = time.perf_counter() - started
+        # Citations are what the database keeps after per-document de-duplication,
+        # so citations/s compares with the citations table of a real run.
+        citations, unresolved = conn.execute("""
+            SELECT COUNT(*), COALESCE(SUM(COALESCE(a.reporter, '') = ''), 0)
+            FROM citations c JOIN authority a ON a.authority_id = c.authority_id
+        """).fetchone()
+        conn.close()
+
+    return {
+        "label": label,
+        "documents": len(pdf_paths),
+        "matches": matches,
+        "candidate_rows": candidate_rows,
+        "citations": citations,
+        "unresolved_reporters": unresolved,
+        "total_seconds": round(total, 4),
+        "stages": {stage: round(elapsed, 4) for stage, elapsed in timings.items()},
+        "docs_per_second": round(len(pdf_paths) / total, 2) if total else None,
+        "citations_per_second": round(citations / total, 2) if total else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def benchmark_isolated(*args):
+    # ru_maxrss is the high-water mark of the whole process, so each corpus runs
+    # in a fresh process and its peak RSS is its own.
+    with get_context("spawn").Pool(1) as pool:
+        return pool.apply(benchmark_corpus, args)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_result(result):
+    print(f"{result['label']}: {result['documents']} docs, {result['citations']} citations "
+          f"in {result['total_seconds']:.2f}s "
+          f"({result['docs_per_second']} docs/s, {result['citations_per_second']} citations/s, "
+          f"peak RSS {result['peak_rss_mb']} MiB)")
+    for stage, elapsed in result["stages"].items():
+        share = 100 * elapsed / result["total_seconds"] if result["total_seconds"] else 0
+        print(f"  {stage:<9}{elapsed:9.3f}s {share:5.1f}%")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Time each stage of the PDF ingestion pipeline.")
+    parser.add_argument("--pdf-folder", default=M.PDF_FOLDER,
+                        help="real corpus to benchmark; pass an empty string to skip it")
+    parser.add_argument("--reporter-db", default=M.REPORTER_DB_PATH)
+    parser.add_argument("--limit", type=int, default=None, help="benchmark only the first N PDFs of the real corpus")
+    parser.add_argument("--synthetic-docs", type=int, default=0, help="size of the generated corpus (default: 0, none)")
+    parser.add_argument("--synthetic-pages", type=int, default=10, help="pages per synthetic judgment")
+    parser.add_argument("--citation-density", type=int, default=5, help="citations per synthetic page")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keep-synthetic", default=None,
+                        help="write the synthetic corpus to this folder instead of a temporary one")
+    parser.add_argument("--commit-every", type=int, default=50)
+    parser.add_argument("--output", default=BENCH_OUTPUT, help=f"JSON lines file results are appended to (default: {BENCH_OUTPUT})")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    reporterJurisdictionDict = M.reporter_jurisdiction_dict(args.reporter_db)
+    run = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "pymupdf": getattr(fitz, "VersionBind", None),
+    }
+    results = []
+
+    if args.pdf_folder:
+        pdf_paths = M.list_pdf_files(args.pdf_folder)[:args.limit]
+        results.append(benchmark_isolated(args.pdf_folder, pdf_paths, reporterJurisdictionDict, args.commit_every))
+
+    if args.synthetic_docs:
+        synthetic_dir = args.keep_synthetic or tempfile.mkdtemp(prefix="synthetic-corpus-")
+        try:
+            pdf_paths = generate_synthetic_corpus(
+                synthetic_dir, args.synthetic_docs, args.synthetic_pages, args.citation_density, args.seed
+            )
+            result = benchmark_isolated("synthetic", pdf_paths, reporterJurisdictionDict, args.commit_every)
+            result["synthetic"] = {
+                "pages": args.synthetic_pages, "citation_density": args.citation_density, "seed": args.seed,
+            }
+            results.append(result)
+        finally:
+            if not args.keep_synthetic:
+                shutil.rmtree(synthetic_dir, ignore_errors=True)
+
+    with open(args.output, "a", encoding="utf-8") as f:
+        for result in results:
+            print_result(result)
+            f.write(json.dumps({**run, **result}) + "\n")
+
+
+if __name__ == "__main__":
+    main()
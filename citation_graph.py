@@ -0,0 +1,273 @@
+import os
+import re
+import argparse
+import sqlite3
+
+import numpy as np
+
+from Modularized import DB_PATH, clean_string
+
+GRAPH_DIR_SUFFIX = ".graph"
+CSR_ARRAYS = ("out_indptr", "out_indices", "in_indptr", "in_indices")
+# "[2010] JRC 068" and "[2010] JRC 68" are the same judgment.
+PADDED_NUMBER_RE = re.compile(r"(?<=[a-z])0+(?=\d)")
+
+
+def graph_key(citation):
+    return PADDED_NUMBER_RE.sub("", clean_string(citation))
+
+
+def create_graph_tables(cur):
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS graph_nodes (
+        node_id INTEGER PRIMARY KEY,
+        node_key TEXT UNIQUE,
+        label TEXT,
+        is_judgment INTEGER
+    )
+    """)
+
+
+def to_csr(sources, targets, node_count):
+    order = np.lexsort((targets, sources))
+    indices = targets[order].astype(np.int32)
+    indptr = np.zeros(node_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=node_count), out=indptr[1:])
+    return indptr, indices
+
+
+def build_citation_graph(db_path=DB_PATH, graph_dir=None):
+    """
+    Resolves every citation to a node and writes the graph as CSR arrays.
+
+    Judgments in main_paper become nodes keyed by their neutral citation; a
+    citation whose normalised text matches a judgment's neutral citation or
+    reported_in links to it, anything else becomes an external authority node
+    keyed by its normalised citation (graph_key). Repeated edges and
+    self-citations are dropped. Node metadata goes to the graph_nodes table of
+    the database.
+    """
+    graph_dir = graph_dir or os.path.splitext(db_path)[0] + GRAPH_DIR_SUFFIX
+    conn = sqlite3.connect(db_path)
+    cur = conn.cursor()
+
+    node_keys = []
+    labels = []
+    node_ids = {}
+    resolve = {}
+    cur.execute("SELECT neutral_citation, reported_in, name FROM main_paper ORDER BY neutral_citation")
+    for neutral_citation, reported_in, name in cur.fetchall():
+        node_ids[neutral_citation] = len(node_keys)
+        node_keys.append(neutral_citation)
+        labels.append(name)
+        for alias in (neutral_citation, reported_in):
+            if alias:
+                resolve.setdefault(graph_key(alias), node_ids[neutral_citation])
+    judgment_count = len(node_keys)
+
+    sources = []
+    targets = []
+    cur.execute("SELECT neutral_citation, citation FROM citations ORDER BY rowid")
+    for neutral_citation, citation in cur:
+        source = node_ids.get(neutral_citation)
+        if source is None:
+            continue
+        key = graph_key(citation or "")
+        target = resolve.get(key)
+        if target is None:
+            target = len(node_keys)
+            resolve[key] = target
+            node_keys.append(key)
+            labels.append(citation)
+        if target != source:
+            sources.append(source)
+            targets.append(target)
+
+    node_count = len(node_keys)
+    edges = np.unique(np.array([sources, targets], dtype=np.int64).reshape(2, -1), axis=1)
+    out_indptr, out_indices = to_csr(edges[0], edges[1], node_count)
+    in_indptr, in_indices = to_csr(edges[1], edges[0], node_count)
+
+    os.makedirs(graph_dir, exist_ok=True)
+    for name, array in zip(CSR_ARRAYS, (out_indptr, out_indices, in_indptr, in_indices)):
+        np.save(os.path.join(graph_dir, f"{name}.npy"), array)
+
+    create_graph_tables(cur)
+    cur.execute("DELETE FROM graph_nodes")
+    cur.executemany(
+        "INSERT INTO graph_nodes (node_id, node_key, label, is_judgment) VALUES (?, ?, ?, ?)",
+        ((i, key, label, int(i < judgment_count)) for i, (key, label) in enumerate(zip(node_keys, labels))),
+    )
+    conn.commit()
+    conn.close()
+    return node_count, edges.shape[1]
+
+
+def csr_neighbors(indptr, indices, nodes):
+    starts = indptr[nodes]
+    lengths = indptr[nodes + 1] - starts
+    total = int(lengths.sum())
+    if not total:
+        return np.empty(0, dtype=indices.dtype), lengths
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+    return indices[offsets], lengths
+
+
+class CitationGraph:
+    """
+    Read-only view of a built citation graph. The CSR arrays are memory-mapped;
+    "out" edges go from a citing judgment to the authority it cites.
+    """
+
+    def __init__(self, db_path=DB_PATH, graph_dir=None, mmap=True):
+        graph_dir = graph_dir or os.path.splitext(db_path)[0] + GRAPH_DIR_SUFFIX
+        mode = "r" if mmap else None
+        self.out_indptr, self.out_indices, self.in_indptr, self.in_indices = (
+            np.load(os.path.join(graph_dir, f"{name}.npy"), mmap_mode=mode) for name in CSR_ARRAYS
+        )
+        self.node_count = len(self.out_indptr) - 1
+        conn = sqlite3.connect(db_path)
+        rows = conn.execute("SELECT node_id, node_key, label, is_judgment FROM graph_nodes ORDER BY node_id").fetchall()
+        conn.close()
+        self.node_keys = [row[1] for row in rows]
+        self.labels = [row[2] for row in rows]
+        self.is_judgment = np.array([row[3] for row in rows], dtype=bool)
+        self.node_ids = {key: node_id for node_id, key in enumerate(self.node_keys)}
+        self._out_degree = None
+        self._in_degree = None
+
+    def node_id(self, key):
+        """Looks a node up by neutral citation or by any citation text that normalises to its key."""
+        node_id = self.node_ids.get(key)
+        if node_id is None:
+            node_id = self.node_ids.get(graph_key(key))
+        if node_id is None:
+            raise KeyError(key)
+        return node_id
+
+    def describe(self, node_id):
+        return self.node_keys[node_id], self.labels[node_id]
+
+    def out_degree(self, node_id=None):
+        if self._out_degree is None:
+            self._out_degree = np.diff(self.out_indptr)
+        return self._out_degree if node_id is None else int(self._out_degree[node_id])
+
+    def in_degree(self, node_id=None):
+        if self._in_degree is None:
+            self._in_degree = np.diff(self.in_indptr)
+        return self._in_degree if node_id is None else int(self._in_degree[node_id])
+
+    def cites(self, node_id):
+        return self.out_indices[self.out_indptr[node_id]:self.out_indptr[node_id + 1]]
+
+    def cited_by(self, node_id):
+        return self.in_indices[self.in_indptr[node_id]:self.in_indptr[node_id + 1]]
+
+    def most_cited(self, n=10):
+        degree = self.in_degree()
+        top = np.argpartition(-degree, min(n, self.node_count - 1))[:n] if self.node_count > n else np.arange(self.node_count)
+        return sorted(((int(i), int(degree[i])) for i in top), key=lambda item: (-item[1], item[0]))
+
+    def pagerank(self, damping=0.85, tol=1e-10, max_iter=100):
+        n = self.node_count
+        out_degree = self.out_degree().astype(np.float64)
+        sources = np.repeat(np.arange(n), self.out_degree())
+        targets = np.asarray(self.out_indices)
+        dangling = out_degree == 0
+        weights = np.divide(1.0, out_degree, out=np.zeros(n), where=~dangling)
+        rank = np.full(n, 1.0 / n)
+        for _ in range(max_iter):
+            spread = np.bincount(targets, weights=(rank * weights)[sources], minlength=n)
+            new_rank = (1 - damping) / n + damping * (spread + rank[dangling].sum() / n)
+            if np.abs(new_rank - rank).sum() < tol:
+                return new_rank
+            rank = new_rank
+        return rank
+
+    def k_hop(self, node_id, k=1, direction="cites"):
+        """Nodes reachable within k citation steps, following "cites" or "cited_by" edges."""
+        indptr, indices = (
+            (self.out_indptr, self.out_indices) if direction == "cites" else (self.in_indptr, self.in_indices)
+        )
+        seen = np.zeros(self.node_count, dtype=bool)
+        seen[node_id] = True
+        frontier = np.array([node_id])
+        for _ in range(k):
+            neighbors, _ = csr_neighbors(indptr, indices, frontier)
+            frontier = np.unique(neighbors[~seen[neighbors]])
+            if not len(frontier):
+                break
+            seen[frontier] = True
+        seen[node_id] = False
+        return np.flatnonzero(seen)
+
+    def shortest_path(self, source, target):
+        """Shortest chain of citations from source to target, or None if target is unreachable."""
+        parent = np.full(self.node_count, -1, dtype=np.int64)
+        parent[source] = source
+        frontier = np.array([source])
+        while len(frontier) and parent[target] < 0:
+            neighbors, lengths = csr_neighbors(self.out_indptr, self.out_indices, frontier)
+            origins = np.repeat(frontier, lengths)
+            fresh = parent[neighbors] < 0
+            frontier, first = np.unique(neighbors[fresh], return_index=True)
+            parent[frontier] = origins[fresh][first]
+        if parent[target] < 0:
+            return None
+        path = [int(target)]
+        while path[-1] != source:
+            path.append(int(parent[path[-1]]))
+        return path[::-1]
+
+
+def print_nodes(graph, node_ids, scores=None):
+    for i, node_id in enumerate(node_ids):
+        key, label = graph.describe(node_id)
+        score = f"{scores[i]:>10}  " if scores is not None else ""
+        print(f"{score}{key}  {label or ''}"[:160])
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build and query the citation graph.")
+    parser.add_argument("--db-path", default=DB_PATH)
+    parser.add_argument("--graph-dir", default=None)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("build", help="resolve citations and write the CSR arrays")
+    top = commands.add_parser("most-cited", help="nodes with the highest in-degree")
+    top.add_argument("-n", type=int, default=20)
+    rank = commands.add_parser("pagerank", help="nodes with the highest PageRank")
+    rank.add_argument("-n", type=int, default=20)
+    hop = commands.add_parser("k-hop", help="nodes within k citation steps")
+    hop.add_argument("citation")
+    hop.add_argument("-k", type=int, default=1)
+    hop.add_argument("--cited-by", action="store_true", help="follow incoming instead of outgoing citations")
+    path = commands.add_parser("path", help="shortest citation path between two nodes")
+    path.add_argument("source")
+    path.add_argument("target")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.command == "build":
+        nodes, edges = build_citation_graph(args.db_path, args.graph_dir)
+        print(f"Built citation graph with {nodes} nodes and {edges} edges.")
+    else:
+        graph = CitationGraph(args.db_path, args.graph_dir)
+        if args.command == "most-cited":
+            top = graph.most_cited(args.n)
+            print_nodes(graph, [node_id for node_id, _ in top], [degree for _, degree in top])
+        elif args.command == "pagerank":
+            rank = graph.pagerank()
+            top = np.argsort(-rank)[:args.n]
+            print_nodes(graph, top, [f"{rank[i]:.6f}" for i in top])
+        elif args.command == "k-hop":
+            direction = "cited_by" if args.cited_by else "cites"
+            print_nodes(graph, graph.k_hop(graph.node_id(args.citation), args.k, direction))
+        elif args.command == "path":
+            found = graph.shortest_path(graph.node_id(args.source), graph.node_id(args.target))
+            if found is None:
+                print("No citation path found.")
+            else:
+                print_nodes(graph, found)
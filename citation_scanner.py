@@ -0,0 +1,123 @@
+import re
+from bisect import bisect_left
+from functools import lru_cache
+
+# Every citation the scanner reports contains one of these tokens, so they are
+# located first with a cheap pattern and the full citation patterns are only
+# tried around them.
+YEAR_TOKEN_PATTERN = r"\[\d{4}\]|\(\d{4}\)"
+# Characters allowed in a case name by CITATION_PATTERN; anything else (newlines,
+# semicolons, quotes, ...) ends the run a name can start in.
+NAME_CHARS = r"A-Za-z0-9.,'’()\- &:"
+# Characters carried from one page window into the next so that citations
+# broken across a page boundary are still found whole.
+STREAM_OVERLAP = 2000
+
+
+class CitationScanner:
+    """
+    Finds the same matches as re.finditer over the citation patterns, but only
+    attempts a match where one can start instead of at every character.
+
+    Named citations are a run of name characters, optional whitespace, then a
+    bracketed or parenthesised year, so a match can only start at a capital
+    letter in the name run directly before a year token. Unnamed citations start
+    at the year token itself.
+    """
+
+    def __init__(self, citation_pattern, no_name_pattern):
+        self.citation_re = re.compile(citation_pattern)
+        self.no_name_re = re.compile(no_name_pattern)
+        self.year_token_re = re.compile(YEAR_TOKEN_PATTERN)
+        self.name_break_re = re.compile(rf"[^{NAME_CHARS}]")
+        self.name_start_re = re.compile(r"[A-Z]")
+
+    def candidate_starts(self, text):
+        starts = set()
+        breaks = None
+        for token in self.year_token_re.finditer(text):
+            end = token.start() - 1
+            while end >= 0 and text[end].isspace():
+                end -= 1
+            if end < 0 or self.name_break_re.match(text, end):
+                continue
+            if breaks is None:
+                breaks = [m.start() for m in self.name_break_re.finditer(text)]
+            i = bisect_left(breaks, end)
+            run_start = breaks[i - 1] + 1 if i else 0
+            starts.update(m.start() for m in self.name_start_re.finditer(text, run_start, end + 1))
+        return sorted(starts)
+
+    def named_matches(self, text):
+        pos = 0
+        for start in self.candidate_starts(text):
+            if start < pos:
+                continue
+            match = self.citation_re.match(text, start)
+            if match:
+                yield match
+                pos = match.end()
+
+    def unnamed_matches(self, text):
+        pos = 0
+        for token in self.year_token_re.finditer(text):
+            if token.start() < pos:
+                continue
+            match = self.no_name_re.match(text, token.start())
+            if match:
+                yield match
+                pos = match.end()
+
+    def scan(self, text, new_text):
+        """
+        Yields (groups, named) pairs: named citations from the footer-stripped text,
+        then unnamed ones from the newline-normalised text.
+        """
+        for match in self.named_matches(text):
+            yield match.groups(), True
+        for match in self.unnamed_matches(new_text):
+            yield match.groups(), False
+
+    def scan_stream(self, pages, overlap=STREAM_OVERLAP):
+        """
+        Same output as scan() over the joined pages, reading (text, new_text) one
+        page at a time. Matches starting before the last `overlap` characters of
+        the current window are final; the rest of the window is carried forward.
+        Unnamed citations are held back until the end to keep scan()'s ordering.
+        """
+        unnamed = []
+        text_carry = new_text_carry = ""
+        for page_text, page_new_text in pages:
+            text_window = text_carry + page_text
+            # Cut at a line start so a carried case name is never truncated.
+            text_cut = text_window.rfind("\n", 0, max(0, len(text_window) - overlap)) + 1
+            found, text_carry = self._scan_window(text_window, text_cut, self.named_matches)
+            for groups in found:
+                yield groups, True
+            new_text_window = new_text_carry + page_new_text
+            new_text_cut = max(0, len(new_text_window) - overlap)
+            found, new_text_carry = self._scan_window(new_text_window, new_text_cut, self.unnamed_matches)
+            unnamed.extend(found)
+        found, _ = self._scan_window(text_carry, len(text_carry), self.named_matches)
+        for groups in found:
+            yield groups, True
+        found, _ = self._scan_window(new_text_carry, len(new_text_carry), self.unnamed_matches)
+        unnamed.extend(found)
+        for groups in unnamed:
+            yield groups, False
+
+    @staticmethod
+    def _scan_window(window, cut, matcher):
+        found = []
+        end = 0
+        for match in matcher(window):
+            if match.start() >= cut and cut < len(window):
+                break
+            found.append(match.groups())
+            end = match.end()
+        return found, window[max(cut, end):]
+
+
+@lru_cache(maxsize=None)
+def get_scanner(citation_pattern, no_name_pattern):
+    return CitationScanner(citation_pattern, no_name_pattern)
@@ -0,0 +1,108 @@
+import os
+import re
+import json
+
+CONTENTS_FILE = "00--Contents.html"
+# Bulk-download file names end in the vLex document id: "...-793713505.pdf".
+VLEX_ID_RE = re.compile(r"-(\d+)\.pdf$", re.IGNORECASE)
+DOWNLOADED_DATA_RE = re.compile(r"window\.downloaded_data\s*=\s*(\[.*?\]);\s*$", re.DOTALL | re.MULTILINE)
+CURRENT_DOMAIN_RE = re.compile(r"window\.current_domain\s*=\s*(.+?);\s*$", re.MULTILINE)
+
+
+def create_index_table(cur):
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS document_index (
+        vlex_document_id TEXT PRIMARY KEY,
+        pdf_path TEXT
+    )
+    """)
+
+
+def vlex_id_from_path(pdf_path):
+    match = VLEX_ID_RE.search(os.path.basename(pdf_path))
+    return f"VLEX-{match.group(1)}" if match else None
+
+
+def parse_contents(contents_path):
+    """
+    Returns the document entries listed in a bulk-download contents file, each
+    with its "vlex_document_id", "domain" and, for downloaded documents, the
+    resolved "pdf" path.
+    """
+    with open(contents_path, encoding="utf-8") as f:
+        html = f.read()
+    match = DOWNLOADED_DATA_RE.search(html)
+    if not match:
+        return []
+    # window.current_domain="https://"+"justis.vlex.com";
+    domain = CURRENT_DOMAIN_RE.search(html)
+    domain = "".join(re.findall(r'"([^"]*)"', domain.group(1))) if domain else None
+    folder = os.path.dirname(contents_path)
+    entries = []
+    for entry in json.loads(match.group(1)):
+        entry["vlex_document_id"] = f"VLEX-{entry['id']}"
+        entry["domain"] = domain
+        pdf = (entry.get("bulk_download") or {}).get("pdf_path")
+        entry["pdf"] = os.path.join(folder, pdf) if pdf else None
+        entries.append(entry)
+    return entries
+
+
+class DocumentIndex:
+    """
+    Pre-pass over a bulk-download folder built from the contents files and the
+    ids in the PDF file names, before any PDF is opened. Each vLex document
+    keeps a single PDF: the one recorded by an earlier run if it is still
+    there, else the first in path order; the rest are duplicates.
+    """
+
+    def __init__(self, pdf_folder, pdf_paths, known_paths=None):
+        self.entries = {}
+        for root, dirs, files in os.walk(pdf_folder):
+            dirs.sort()
+            if CONTENTS_FILE in files:
+                for entry in parse_contents(os.path.join(root, CONTENTS_FILE)):
+                    # Batch contents files are more specific than the folder-level one.
+                    known = self.entries.get(entry["vlex_document_id"])
+                    if known is None or entry["pdf"] and not known["pdf"]:
+                        self.entries[entry["vlex_document_id"]] = entry
+
+        known_paths = known_paths or {}
+        present = set(pdf_paths)
+        self.pdf_ids = {}
+        self.canonical = {}
+        for pdf_path in pdf_paths:
+            vlex_id = vlex_id_from_path(pdf_path)
+            if vlex_id is None:
+                continue
+            self.pdf_ids[pdf_path] = vlex_id
+            if vlex_id not in self.canonical:
+                known = known_paths.get(vlex_id)
+                self.canonical[vlex_id] = known if known in present else pdf_path
+        self.pdf_paths = []
+        self.duplicates = []
+        for pdf_path in pdf_paths:
+            if pdf_path not in self.pdf_ids or self.canonical[self.pdf_ids[pdf_path]] == pdf_path:
+                self.pdf_paths.append(pdf_path)
+            else:
+                self.duplicates.append(pdf_path)
+
+    def entry_for(self, pdf_path):
+        return self.entries.get(self.pdf_ids.get(pdf_path))
+
+    def missing_entries(self):
+        """Listed documents with no PDF on disk (e.g. denied downloads)."""
+        return [entry for vlex_id, entry in self.entries.items() if vlex_id not in self.canonical]
+
+
+def load_known_paths(cur):
+    create_index_table(cur)
+    cur.execute("SELECT vlex_document_id, pdf_path FROM document_index")
+    return dict(cur.fetchall())
+
+
+def save_index(cur, index):
+    cur.executemany(
+        "INSERT OR REPLACE INTO document_index (vlex_document_id, pdf_path) VALUES (?, ?)",
+        sorted(index.canonical.items()),
+    )
@@ -0,0 +1,221 @@
+import os
+import glob
+import argparse
+import sqlite3
+from datetime import datetime, timezone
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+DB_PATH = "Jersey.db"
+CHUNK_ROWS = 50000
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+DICTIONARY = pa.dictionary(pa.int32(), pa.string())
+MAIN_PAPER_SCHEMA = pa.schema([
+    ("neutral_citation", pa.string()),
+    ("name", pa.string()),
+    ("jurisdiction", DICTIONARY),
+    ("judge", pa.string()),
+    ("judgment_date", pa.string()),
+    ("reported_in", pa.string()),
+    ("court", DICTIONARY),
+    ("vlex_document_id", pa.string()),
+    ("link", pa.string()),
+])
+CITATIONS_SCHEMA = pa.schema([
+    ("neutral_citation", pa.string()),
+    ("citation_name", pa.string()),
+    ("citation", pa.string()),
+    ("reporter", DICTIONARY),
+    ("jurisdiction", DICTIONARY),
+    ("year", pa.int32()),
+    ("normalized_citation", pa.string()),
+])
+# Reporter, jurisdiction, year and normalized form come from the citation's authority.
+CITATIONS_SELECT = ", ".join(
+    ("a." if name in ("reporter", "jurisdiction", "year", "normalized_citation") else "c.") + name
+    for name in CITATIONS_SCHEMA.names
+)
+
+
+def create_export_tables(cur):
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS export_runs (
+        export_id INTEGER PRIMARY KEY,
+        out_dir TEXT,
+        format TEXT,
+        exported_at TEXT,
+        documents INTEGER,
+        citations INTEGER
+    )
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS exported_documents (
+        out_dir TEXT,
+        neutral_citation TEXT,
+        export_id INTEGER,
+        PRIMARY KEY (out_dir, neutral_citation)
+    )
+    """)
+
+
+class DictionaryEncoder:
+    """
+    One growing dictionary per column for a whole export, so every batch's
+    dictionary extends the previous one (Arrow IPC files only accept such
+    deltas) and codes stay stable across Parquet row groups.
+    """
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def encode(self, column):
+        indices = []
+        for value in column:
+            if value is None:
+                indices.append(None)
+                continue
+            code = self.codes.get(value)
+            if code is None:
+                code = self.codes[value] = len(self.values)
+                self.values.append(value)
+            indices.append(code)
+        return pa.DictionaryArray.from_arrays(
+            pa.array(indices, type=pa.int32()), pa.array(self.values, type=pa.string())
+        )
+
+
+def record_batch(rows, schema, encoders):
+    columns = list(zip(*rows))
+    arrays = []
+    for field, column in zip(schema, columns):
+        if pa.types.is_dictionary(field.type):
+            arrays.append(encoders.setdefault(field.name, DictionaryEncoder()).encode(column))
+        else:
+            arrays.append(pa.array(column, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def open_writer(path, schema, fmt):
+    if fmt == "parquet":
+        return pq.ParquetWriter(path, schema, compression="zstd")
+    return ipc.new_file(path, schema, options=ipc.IpcWriteOptions(emit_dictionary_deltas=True))
+
+
+def write_chunks(cur, sql, schema, path, fmt, chunk_rows):
+    """Streams the query result into one file, chunk_rows rows per batch. Returns the row count."""
+    cur.execute(sql)
+    encoders = {}
+    writer = None
+    count = 0
+    while True:
+        rows = cur.fetchmany(chunk_rows)
+        if not rows:
+            break
+        if writer is None:
+            writer = open_writer(path, schema, fmt)
+        batch = record_batch(rows, schema, encoders)
+        if fmt == "parquet":
+            writer.write_table(pa.Table.from_batches([batch]))
+        else:
+            writer.write_batch(batch)
+        count += len(rows)
+    if writer is not None:
+        writer.close()
+    return count
+
+
+def export_database(db_path=DB_PATH, out_dir=None, fmt="parquet", full=False, chunk_rows=CHUNK_ROWS):
+    """
+    Appends main_paper and citations rows of documents not yet exported to
+    out_dir as new part files: <out_dir>/main_paper/part-NNNNN<ext> and
+    <out_dir>/citations/part-NNNNN<ext>. Each directory reads back as one
+    dataset, e.g. pandas.read_parquet(out_dir + "/citations"). full drops the
+    earlier parts and exports everything again, which is also how documents
+    re-ingested after their export get refreshed.
+    Returns (export_id, documents, citations).
+    """
+    out_dir = out_dir or os.path.splitext(db_path)[0] + FORMATS[fmt]
+    ext = FORMATS[fmt]
+    conn = sqlite3.connect(db_path)
+    cur = conn.cursor()
+    create_export_tables(cur)
+    key = os.path.abspath(out_dir)
+    if full:
+        for table in ("main_paper", "citations"):
+            for part in glob.glob(os.path.join(out_dir, table, f"part-*{ext}")):
+                os.remove(part)
+        cur.execute("DELETE FROM exported_documents WHERE out_dir = ?", (key,))
+
+    cur.execute("DROP TABLE IF EXISTS temp.export_documents")
+    cur.execute("""
+        CREATE TEMP TABLE export_documents AS
+        SELECT m.neutral_citation FROM main_paper m
+        WHERE NOT EXISTS (
+            SELECT 1 FROM exported_documents e WHERE e.out_dir = ? AND e.neutral_citation = m.neutral_citation
+        )
+        ORDER BY m.rowid
+    """, (key,))
+    cur.execute("SELECT COUNT(*) FROM temp.export_documents")
+    if not cur.fetchone()[0]:
+        conn.close()
+        return None, 0, 0
+
+    cur.execute(
+        "INSERT INTO export_runs (out_dir, format, exported_at) VALUES (?, ?, ?)",
+        (key, fmt, datetime.now(timezone.utc).isoformat(timespec="seconds")),
+    )
+    export_id = cur.lastrowid
+    part = f"part-{export_id:05d}{ext}"
+    for table in ("main_paper", "citations"):
+        os.makedirs(os.path.join(out_dir, table), exist_ok=True)
+
+    read_cur = conn.cursor()
+    documents = write_chunks(read_cur, f"""
+        SELECT {", ".join(MAIN_PAPER_SCHEMA.names)} FROM main_paper
+        WHERE neutral_citation IN (SELECT neutral_citation FROM temp.export_documents)
+        ORDER BY rowid
+    """, MAIN_PAPER_SCHEMA, os.path.join(out_dir, "main_paper", part), fmt, chunk_rows)
+    citations = write_chunks(read_cur, f"""
+        SELECT {CITATIONS_SELECT} FROM citations c
+        JOIN temp.export_documents d ON d.neutral_citation = c.neutral_citation
+        JOIN authority a ON a.authority_id = c.authority_id
+        ORDER BY c.rowid
+    """, CITATIONS_SCHEMA, os.path.join(out_dir, "citations", part), fmt, chunk_rows)
+
+    # Recorded only after both files are closed, so an interrupted export is redone.
+    cur.execute("""
+        INSERT INTO exported_documents (out_dir, neutral_citation, export_id)
+        SELECT ?, neutral_citation, ? FROM temp.export_documents
+    """, (key, export_id))
+    cur.execute("UPDATE export_runs SET documents = ?, citations = ? WHERE export_id = ?",
+                (documents, citations, export_id))
+    conn.commit()
+    conn.close()
+    return export_id, documents, citations
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Export main_paper and citations to Parquet or Arrow IPC files.")
+    parser.add_argument("--db-path", default=DB_PATH)
+    parser.add_argument("--out-dir", default=None,
+                        help="output directory (default: the database path with a .parquet/.arrow suffix)")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="parquet")
+    parser.add_argument("--full", action="store_true", help="replace earlier parts with a complete export")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS,
+                        help=f"rows per batch / row group (default: {CHUNK_ROWS})")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    export_id, documents, citations = export_database(
+        args.db_path, args.out_dir, args.format, args.full, args.chunk_rows
+    )
+    if export_id is None:
+        print("Nothing new to export.")
+    else:
+        print(f"Export {export_id}: {documents} document(s), {citations} citation(s).")
@@ -0,0 +1,90 @@
+import os
+import json
+from datetime import datetime, timezone
+
+STAGE_COLUMNS = ("extract_seconds", "metadata_seconds", "citations_seconds", "commit_seconds")
+COUNT_COLUMNS = ("citations", "duplicates", "unresolved_reporters")
+
+
+def create_metrics_table(cur):
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS ingestion_metrics (
+        run_id TEXT,
+        pdf_path TEXT,
+        neutral_citation TEXT,
+        extract_seconds REAL,
+        metadata_seconds REAL,
+        citations_seconds REAL,
+        commit_seconds REAL,
+        total_seconds REAL,
+        citations INTEGER,
+        duplicates INTEGER,
+        unresolved_reporters INTEGER
+    )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_ingestion_metrics_run ON ingestion_metrics (run_id, total_seconds)")
+
+
+class MetricsRecorder:
+    """
+    Collects the per-document timings and counters gathered by parse_pdf and
+    BulkWriter, writing them to the ingestion_metrics table and/or a JSON lines
+    log. commit_seconds is each document's share of its batch's flush.
+    """
+
+    def __init__(self, conn=None, log_path=None, run_id=None):
+        self.conn = conn
+        self.log_path = log_path
+        self.run_id = run_id or datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self.pending = []
+        self.documents = []
+        if conn is not None:
+            create_metrics_table(conn.cursor())
+
+    def add(self, record):
+        meta = record["meta"]
+        metrics = dict(record.get("metrics") or {})
+        metrics["pdf_path"] = record["pdf_path"]
+        metrics["neutral_citation"] = meta["neutral_citation"] or meta["reported_in"]
+        self.pending.append(metrics)
+
+    def batch_committed(self, seconds):
+        if not self.pending:
+            return
+        share = seconds / len(self.pending)
+        for metrics in self.pending:
+            metrics["commit_seconds"] = share
+            metrics["total_seconds"] = sum(metrics.get(column) or 0.0 for column in STAGE_COLUMNS)
+        if self.conn is not None:
+            self.conn.executemany(
+                "INSERT INTO ingestion_metrics VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (self.run_id, m["pdf_path"], m["neutral_citation"])
+                    + tuple(m.get(column) for column in STAGE_COLUMNS)
+                    + (m["total_seconds"],)
+                    + tuple(m.get(column, 0) for column in COUNT_COLUMNS)
+                    for m in self.pending
+                ],
+            )
+            self.conn.commit()
+        if self.log_path:
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                for metrics in self.pending:
+                    f.write(json.dumps({"run_id": self.run_id, **metrics}) + "\n")
+        self.documents.extend(self.pending)
+        self.pending = []
+
+    def print_summary(self, slowest=10):
+        if not self.documents:
+            return
+        print(f"Ingestion metrics for run {self.run_id}: {len(self.documents)} document(s)")
+        total = sum(m["total_seconds"] for m in self.documents)
+        for column in STAGE_COLUMNS:
+            elapsed = sum(m.get(column) or 0.0 for m in self.documents)
+            share = 100 * elapsed / total if total else 0
+            print(f"  {column[:-len('_seconds')]:<10}{elapsed:9.3f}s {share:5.1f}%")
+        for column in COUNT_COLUMNS:
+            print(f"  {column:<21}{sum(m.get(column, 0) for m in self.documents)}")
+        print(f"Slowest {min(slowest, len(self.documents))} document(s):")
+        for m in sorted(self.documents, key=lambda m: m["total_seconds"], reverse=True)[:slowest]:
+            print(f"  {m['total_seconds']:8.3f}s  {m.get('citations', 0):5d} citations  {os.path.basename(m['pdf_path'])}")
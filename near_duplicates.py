@@ -0,0 +1,301 @@
+import re
+import zlib
+import string
+import hashlib
+import argparse
+import sqlite3
+
+import numpy as np
+
+DB_PATH = "Jersey.db"
+SHINGLE_WORDS = 5
+NUM_PERM = 128
+# Pairs exactly at the threshold must share a bucket at least this often; the
+# bands and rows are derived from it (16 bands of 8 rows at the 0.9 default,
+# 25 of 5 at 0.8). Candidates are re-checked against the threshold, so the
+# extra ones a lower threshold brings only cost a comparison each.
+MIN_RECALL = 0.9998
+THRESHOLD = 0.9
+# Fewer shingles than this (e.g. scans without a text layer) give no signature,
+# otherwise every empty document would match every other.
+MIN_SHINGLES = 20
+CHUNK_SHINGLES = 1024
+
+WORD_RE = re.compile(rb"[a-z0-9]+")
+WORD_CHARS = string.ascii_letters + string.digits
+MAX_HASH = np.uint64((1 << 32) - 1)
+# The permutations are multiply-add-shift hashes of the 32-bit shingle hashes,
+# (a * x + b) >> 32 in 64-bit arithmetic with odd a; no modulo needed. Fixed
+# seed: signatures are stored and must compare across runs.
+_permutations = np.random.RandomState(1).randint(0, 1 << 63, size=(2, NUM_PERM), dtype=np.uint64)
+PERM_A = _permutations[0] * np.uint64(2) + np.uint64(1)
+PERM_B = _permutations[1]
+# Multipliers combining SHINGLE_WORDS word hashes into one shingle hash.
+SHINGLE_MULTIPLIERS = [np.uint64(0x9E3779B97F4A7C15 * (i + 1) % (1 << 64) | 1) for i in range(SHINGLE_WORDS)]
+
+
+class MinHasher:
+    """
+    MinHash over lower-cased word shingles, fed with text in pieces (a whole
+    document or one page at a time) and giving the same signature either way.
+    """
+
+    def __init__(self):
+        # Minima of a * x + b; the shift to 32 bits is monotonic, so it is applied once at the end.
+        self.minimum = np.full(NUM_PERM, np.iinfo(np.uint64).max, dtype=np.uint64)
+        self.buffer = np.empty((CHUNK_SHINGLES, NUM_PERM), dtype=np.uint64)
+        self.tail = np.empty(0, dtype=np.uint64)
+        self.partial = ""
+        self.shingles = 0
+
+    def update(self, text):
+        # A word cut off at the end of this piece continues in the next one.
+        text = self.partial + text
+        cut = len(text.rstrip(WORD_CHARS))
+        self.partial = text[cut:]
+        self._add_words(text[:cut])
+
+    def _add_words(self, text):
+        words = WORD_RE.findall(text.lower().encode("utf-8"))
+        if not words:
+            return
+        hashes = np.concatenate([self.tail, np.fromiter(map(zlib.crc32, words), dtype=np.uint64, count=len(words))])
+        self.tail = hashes[-(SHINGLE_WORDS - 1):]
+        count = len(hashes) - SHINGLE_WORDS + 1
+        if count <= 0:
+            return
+        shingles = np.zeros(count, dtype=np.uint64)
+        for offset, multiplier in enumerate(SHINGLE_MULTIPLIERS):
+            shingles += hashes[offset:offset + count] * multiplier
+        shingles = (shingles >> np.uint64(32)) ^ (shingles & MAX_HASH)
+        for start in range(0, count, CHUNK_SHINGLES):
+            chunk = shingles[start:start + CHUNK_SHINGLES, None]
+            permuted = self.buffer[:len(chunk)]
+            np.multiply(chunk, PERM_A, out=permuted)
+            permuted += PERM_B
+            np.minimum(self.minimum, permuted.min(axis=0), out=self.minimum)
+        self.shingles += count
+
+    def signature(self):
+        """The NUM_PERM 32-bit minima as bytes, or None if the text is too short."""
+        if self.partial:
+            self._add_words(self.partial)
+            self.partial = ""
+        if self.shingles < MIN_SHINGLES:
+            return None
+        return (self.minimum >> np.uint64(32)).astype("<u4").tobytes()
+
+
+def minhash_signature(text):
+    hasher = MinHasher()
+    hasher.update(text)
+    return hasher.signature()
+
+
+def similarity(signature, other):
+    """Estimated Jaccard similarity of the two documents' shingle sets."""
+    return float(np.count_nonzero(
+        np.frombuffer(signature, dtype="<u4") == np.frombuffer(other, dtype="<u4")
+    )) / NUM_PERM
+
+
+def banding(threshold):
+    """(bands, rows) with the most rows per band that still finds pairs at the threshold MIN_RECALL of the time."""
+    if not 0 < threshold <= 1:
+        raise ValueError(f"near-duplicate threshold must be in (0, 1], got {threshold}")
+    for rows in range(NUM_PERM, 0, -1):
+        bands = NUM_PERM // rows
+        if 1 - (1 - threshold ** rows) ** bands >= MIN_RECALL:
+            return bands, rows
+    raise ValueError(f"near-duplicate threshold {threshold} is too low for {NUM_PERM} permutations to band")
+
+
+def band_buckets(signature, bands, rows):
+    # One 64-bit bucket key per band; the band number is hashed in so equal
+    # rows in different bands do not collide.
+    return [
+        int.from_bytes(hashlib.blake2b(
+            bytes([band]) + signature[band * rows * 4:(band + 1) * rows * 4], digest_size=8
+        ).digest(), "little", signed=True)
+        for band in range(bands)
+    ]
+
+
+def create_signature_tables(cur):
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS document_signatures (
+        signature_id INTEGER PRIMARY KEY,
+        pdf_path TEXT UNIQUE,
+        neutral_citation TEXT,
+        signature BLOB
+    )
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS signature_buckets (
+        bucket INTEGER,
+        signature_id INTEGER,
+        PRIMARY KEY (bucket, signature_id)
+    ) WITHOUT ROWID
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_signature_buckets_id ON signature_buckets (signature_id)")
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS document_signatures_ad AFTER DELETE ON document_signatures BEGIN
+        DELETE FROM signature_buckets WHERE signature_id = old.signature_id;
+    END
+    """)
+    # Documents found to be near-identical to one ingested before them.
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS near_duplicates (
+        pdf_path TEXT PRIMARY KEY,
+        neutral_citation TEXT,
+        duplicate_of TEXT,
+        duplicate_citation TEXT,
+        similarity REAL,
+        skipped INTEGER
+    )
+    """)
+    # The mode and threshold the signatures were last written with (one row).
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS near_duplicate_settings (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        mode TEXT,
+        threshold REAL
+    )
+    """)
+
+
+def signatures_enabled(cur):
+    cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'document_signatures'")
+    return cur.fetchone() is not None
+
+
+def load_settings(cur):
+    """(mode, threshold) stored by the last run, or (None, None) if there is none."""
+    cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'near_duplicate_settings'")
+    if cur.fetchone() is None:
+        return None, None
+    cur.execute("SELECT mode, threshold FROM near_duplicate_settings WHERE id = 1")
+    return cur.fetchone() or (None, None)
+
+
+def save_settings(cur, mode, threshold):
+    cur.execute(
+        "INSERT OR REPLACE INTO near_duplicate_settings (id, mode, threshold) VALUES (1, ?, ?)", (mode, threshold)
+    )
+
+
+def forget_signatures(cur, pdf_paths=None):
+    """Drops the signatures and flags of the given PDFs (of every PDF if None) before they are re-processed."""
+    if pdf_paths is None:
+        cur.execute("DELETE FROM document_signatures")
+        cur.execute("DELETE FROM near_duplicates")
+        return
+    rows = [(pdf_path,) for pdf_path in pdf_paths]
+    cur.executemany("DELETE FROM document_signatures WHERE pdf_path = ?", rows)
+    cur.executemany("DELETE FROM near_duplicates WHERE pdf_path = ?", rows)
+
+
+class NearDuplicateIndex:
+    """
+    LSH index over the stored signatures. A lookup reads only the documents
+    sharing a band bucket with the signature (an indexed query per document)
+    plus those added since the last flush, so it does not grow with the corpus.
+    """
+
+    def __init__(self, cur, threshold=THRESHOLD, banding_threshold=None):
+        # The stored buckets were written with the banding of banding_threshold
+        # (the threshold itself unless given), so lookups must use the same one.
+        self.cur = cur
+        self.threshold = threshold
+        self.bands, self.rows = banding(banding_threshold or threshold)
+        self.pending = []
+        self.pending_buckets = {}
+        self.flags = []
+
+    def matches(self, signature):
+        """(pdf_path, neutral_citation, similarity) of the indexed documents at or above the threshold, closest first."""
+        buckets = self.band_buckets(signature)
+        candidates = {}
+        self.cur.execute(f"""
+            SELECT DISTINCT s.pdf_path, s.neutral_citation, s.signature
+            FROM signature_buckets b JOIN document_signatures s ON s.signature_id = b.signature_id
+            WHERE b.bucket IN ({", ".join("?" * len(buckets))})
+        """, buckets)
+        for pdf_path, key, other in self.cur.fetchall():
+            candidates[pdf_path] = (key, other)
+        for bucket in buckets:
+            for position in self.pending_buckets.get(bucket, ()):
+                pdf_path, key, other = self.pending[position]
+                candidates[pdf_path] = (key, other)
+        found = []
+        for pdf_path, (key, other) in candidates.items():
+            score = similarity(signature, other)
+            if score >= self.threshold:
+                found.append((pdf_path, key, score))
+        return sorted(found, key=lambda match: (-match[2], match[0]))
+
+    def find(self, signature):
+        found = self.matches(signature)
+        return found[0] if found else None
+
+    def band_buckets(self, signature):
+        return band_buckets(signature, self.bands, self.rows)
+
+    def add(self, pdf_path, key, signature):
+        for bucket in self.band_buckets(signature):
+            self.pending_buckets.setdefault(bucket, []).append(len(self.pending))
+        self.pending.append((pdf_path, key, signature))
+
+    def flag(self, pdf_path, key, match, skipped):
+        self.flags.append((pdf_path, key, match[0], match[1], round(match[2], 4), int(skipped)))
+
+    def flush(self):
+        for pdf_path, key, signature in self.pending:
+            self.cur.execute("DELETE FROM document_signatures WHERE pdf_path = ?", (pdf_path,))
+            self.cur.execute(
+                "INSERT INTO document_signatures (pdf_path, neutral_citation, signature) VALUES (?, ?, ?)",
+                (pdf_path, key, signature),
+            )
+            signature_id = self.cur.lastrowid
+            self.cur.executemany(
+                "INSERT OR IGNORE INTO signature_buckets (bucket, signature_id) VALUES (?, ?)",
+                [(bucket, signature_id) for bucket in self.band_buckets(signature)],
+            )
+        self.cur.executemany("INSERT OR REPLACE INTO near_duplicates VALUES (?, ?, ?, ?, ?, ?)", self.flags)
+        self.pending.clear()
+        self.pending_buckets.clear()
+        self.flags.clear()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Near-duplicate judgments found during ingestion.")
+    parser.add_argument("--db-path", default=DB_PATH)
+    parser.add_argument("--similar", metavar="PDF", help="list stored documents near-identical to this PDF")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help=f"default: the threshold ingestion last used, else {THRESHOLD}")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    conn = sqlite3.connect(args.db_path)
+    cur = conn.cursor()
+    if args.similar:
+        stored_threshold = load_settings(cur)[1] or THRESHOLD
+        threshold = args.threshold or stored_threshold
+        from Modularized import extract_text_from_pdf
+        signature = minhash_signature(extract_text_from_pdf(args.similar)[0])
+        if signature is None:
+            print("Not enough text for a signature.")
+        else:
+            for pdf_path, key, score in NearDuplicateIndex(cur, threshold, stored_threshold).matches(signature):
+                print(f"{score:.3f}  {key}  {pdf_path}")
+    else:
+        cur.execute("""
+            SELECT similarity, skipped, neutral_citation, pdf_path, duplicate_citation, duplicate_of
+            FROM near_duplicates ORDER BY similarity DESC, pdf_path
+        """)
+        for score, skipped, key, pdf_path, duplicate_key, duplicate_of in cur.fetchall():
+            print(f"{score:.3f}  {'skipped' if skipped else 'kept'}  {key}  {pdf_path}")
+            print(f"       duplicate of {duplicate_key}  {duplicate_of}")
+    conn.close()
@@ -0,0 +1,212 @@
+import os
+import time
+import queue
+import threading
+from multiprocessing import Pool
+
+PREFETCH_FILES = 16
+PREFETCH_MB = 256
+_DONE = object()
+
+
+class StageStats:
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.bytes = 0
+        self.busy = 0.0
+        # Time spent waiting on the stage before (starved) and after (blocked).
+        self.starved = 0.0
+        self.blocked = 0.0
+
+
+class ByteBudget:
+    """Caps the bytes read but not yet written; a single file larger than the cap still gets through."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.used = 0
+        self.cond = threading.Condition()
+
+    def acquire(self, size, stop):
+        with self.cond:
+            while self.used and self.used + size > self.limit and not stop.is_set():
+                self.cond.wait(0.1)
+            self.used += size
+
+    def release(self, size):
+        with self.cond:
+            self.used -= size
+            self.cond.notify_all()
+
+
+class _Failed:
+    def __init__(self, error):
+        self.error = error
+
+
+class IngestPipeline:
+    """
+    Reader -> parse -> writer stages joined by bounded queues. The reader
+    thread prefetches file bytes (at most `prefetch` files and `prefetch_mb`
+    MiB that are not yet written), the parse stage runs parse(task, data, stat)
+    in a thread or, with workers > 1, a process pool, and the caller's thread
+    writes the records in input order. A slow writer fills the queues and
+    stalls the reader instead of letting memory grow.
+    """
+
+    def __init__(self, parse, workers=1, prefetch=PREFETCH_FILES, prefetch_mb=PREFETCH_MB,
+                 initializer=None, initargs=(), progress_every=None):
+        self.parse = parse
+        self.workers = workers
+        self.prefetch = max(1, prefetch)
+        self.budget = ByteBudget(prefetch_mb * 1024 * 1024)
+        self.initializer = initializer
+        self.initargs = initargs
+        self.progress_every = progress_every
+        self.stop = threading.Event()
+        self.stats = {name: StageStats(name) for name in ("read", "parse", "write")}
+
+    def _put(self, q, item, stats):
+        started = time.perf_counter()
+        while not self.stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        stats.blocked += time.perf_counter() - started
+
+    def _get(self, q, stats):
+        started = time.perf_counter()
+        item = _DONE
+        while not self.stop.is_set():
+            try:
+                item = q.get(timeout=0.1)
+                break
+            except queue.Empty:
+                continue
+        stats.starved += time.perf_counter() - started
+        return item
+
+    def _read(self, tasks, read_q):
+        stats = self.stats["read"]
+        try:
+            for task in tasks:
+                if self.stop.is_set():
+                    return
+                started = time.perf_counter()
+                stat = os.stat(task[0])
+                with open(task[0], "rb") as f:
+                    data = f.read()
+                stats.busy += time.perf_counter() - started
+                stats.items += 1
+                stats.bytes += len(data)
+                started = time.perf_counter()
+                self.budget.acquire(len(data), self.stop)
+                stats.blocked += time.perf_counter() - started
+                self._put(read_q, (task, data, stat), stats)
+        except Exception as error:
+            self._put(read_q, _Failed(error), stats)
+        self._put(read_q, _DONE, stats)
+
+    def _dispatch(self, pool, read_q, parsed_q):
+        stats = self.stats["parse"]
+        while not self.stop.is_set():
+            item = self._get(read_q, stats)
+            if item is _DONE or isinstance(item, _Failed):
+                self._put(parsed_q, item, stats)
+                return
+            task, data, stat = item
+            if pool is not None:
+                result = pool.apply_async(self.parse, (task, data, stat))
+            else:
+                started = time.perf_counter()
+                try:
+                    result = self.parse(task, data, stat)
+                except Exception as error:
+                    result = _Failed(error)
+                stats.busy += time.perf_counter() - started
+                stats.items += 1
+                stats.bytes += len(data)
+            self._put(parsed_q, (len(data), result), stats)
+
+    def run(self, tasks, write):
+        """Feeds every task through the stages, calling write(record) for each in input order."""
+        total = len(tasks)
+        read_q = queue.Queue(self.prefetch)
+        # Results still parsing in the pool count against this bound too.
+        parsed_q = queue.Queue(max(2, 2 * self.workers))
+        pool = None
+        if self.workers > 1:
+            pool = Pool(self.workers, initializer=self.initializer, initargs=self.initargs)
+        threads = [
+            threading.Thread(target=self._read, args=(tasks, read_q), daemon=True),
+            threading.Thread(target=self._dispatch, args=(pool, read_q, parsed_q), daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+        stats = self.stats["write"]
+        started = time.perf_counter()
+        last_report = started
+        try:
+            while True:
+                item = self._get(parsed_q, stats)
+                if item is _DONE:
+                    break
+                if isinstance(item, _Failed):
+                    raise item.error
+                size, result = item
+                if pool is not None:
+                    wait_started = time.perf_counter()
+                    result = result.get()
+                    stats.starved += time.perf_counter() - wait_started
+                    self.stats["parse"].busy += parse_seconds(result) / self.workers
+                    self.stats["parse"].items += 1
+                    self.stats["parse"].bytes += size
+                elif isinstance(result, _Failed):
+                    raise result.error
+                self.budget.release(size)
+                write_started = time.perf_counter()
+                write(result)
+                stats.busy += time.perf_counter() - write_started
+                stats.items += 1
+                stats.bytes += size
+                if self.progress_every and time.perf_counter() - last_report >= self.progress_every:
+                    last_report = time.perf_counter()
+                    self.print_progress(total, last_report - started)
+        finally:
+            self.stop.set()
+            for q in (read_q, parsed_q):
+                while True:
+                    try:
+                        q.get_nowait()
+                    except queue.Empty:
+                        break
+            for thread in threads:
+                thread.join()
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+        self.elapsed = time.perf_counter() - started
+
+    def print_progress(self, total, elapsed):
+        print(" | ".join(
+            f"{stats.name} {stats.items}/{total}" for stats in self.stats.values()
+        ) + f" | {elapsed:.1f}s")
+
+    def print_summary(self):
+        elapsed = getattr(self, "elapsed", 0.0)
+        print(f"Pipeline: {self.stats['write'].items} document(s) in {elapsed:.2f}s")
+        print(f"  {'stage':<6}{'items':>7}{'MiB':>9}{'busy s':>9}{'docs/s':>9}{'starved s':>11}{'blocked s':>11}")
+        for stats in self.stats.values():
+            rate = stats.items / stats.busy if stats.busy else 0.0
+            print(f"  {stats.name:<6}{stats.items:>7}{stats.bytes / 1048576:>9.1f}{stats.busy:>9.2f}"
+                  f"{rate:>9.1f}{stats.starved:>11.2f}{stats.blocked:>11.2f}")
+        bottleneck = max(self.stats.values(), key=lambda stats: stats.busy)
+        print(f"  bottleneck: {bottleneck.name}")
+
+
+def parse_seconds(record):
+    metrics = record.get("metrics") or {}
+    return sum(metrics.get(column) or 0.0 for column in ("extract_seconds", "metadata_seconds", "citations_seconds"))
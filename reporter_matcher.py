@@ -0,0 +1,153 @@
+import re
+import difflib
+from collections import deque
+from functools import lru_cache
+
+# The year token and an optional "(2)"-style volume that open a citation.
+CITATION_YEAR_RE = re.compile(r"^\s*[\[(](\d{4})[\])]\s*(?:\(\d{1,4}\))?")
+REPORTER_TOKEN_RE = re.compile(r"[A-Za-z]+")
+FUZZY_CUTOFF = 0.8
+# A near-miss on a shorter key is as likely another reporter ("lpr" is not
+# "lr"), so those only match exactly.
+FUZZY_MIN_LENGTH = 4
+# A volume "1" read as a letter ("[1990] I WLR 1304").
+OCR_VOLUME_TOKENS = ("I", "l")
+
+
+def one_edit_apart(a, b):
+    """Whether b is a with at most one character inserted, deleted or replaced."""
+    if len(a) > len(b):
+        a, b = b, a
+    if len(b) - len(a) > 1:
+        return False
+    for i, (x, y) in enumerate(zip(a, b)):
+        if x != y:
+            return a[i + 1:] == b[i + 1:] if len(a) == len(b) else a[i:] == b[i + 1:]
+    return True
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick automaton over a set of keys. find_all reports every key
+    occurrence in a single left-to-right pass over the text.
+    """
+
+    def __init__(self, keys):
+        self.goto = [{}]
+        self.fail = [0]
+        self.outputs = [[]]
+        for key in keys:
+            if key:
+                self._add(key)
+        self._link()
+
+    def _add(self, key):
+        state = 0
+        for ch in key:
+            nxt = self.goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append([])
+            state = nxt
+        self.outputs[state].append(key)
+
+    def _link(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(ch, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                self.outputs[nxt] = self.outputs[nxt] + self.outputs[self.fail[nxt]]
+
+    def find_all(self, text):
+        state = 0
+        for end, ch in enumerate(text, 1):
+            while state and ch not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(ch, 0)
+            for key in self.outputs[state]:
+                yield end - len(key), end, key
+
+
+class ReporterMatcher:
+    """
+    Resolves the reporter of a citation against the cleaned reporter keys of
+    Reporters.db: the longest key covering whole words from the first word of
+    the citation's reporter part, or else the closest key by difflib ratio
+    among those one edit away with the same first letter (memoised).
+    """
+
+    def __init__(self, reporterJurisdictionDict):
+        self.reporterJurisdictionDict = reporterJurisdictionDict
+        self.keys = sorted(reporterJurisdictionDict)
+        self.automaton = AhoCorasick(self.keys)
+        # Fuzzy candidates by first letter; a misread first letter ("aclr" for
+        # "clr") is more often a different reporter than a typo.
+        self.keys_by_initial = {}
+        for key in self.keys:
+            if len(key) >= FUZZY_MIN_LENGTH:
+                self.keys_by_initial.setdefault(key[0], []).append(key)
+        self.fuzzy_key = lru_cache(maxsize=65536)(self._fuzzy_key)
+
+    def reporter_words(self, actual_citation):
+        match = CITATION_YEAR_RE.match(actual_citation)
+        year = int(match.group(1)) if match else None
+        rest = actual_citation[match.end():] if match else actual_citation
+        words = REPORTER_TOKEN_RE.findall(rest)
+        if len(words) > 1 and words[0] in OCR_VOLUME_TOKENS:
+            words = words[1:]
+        return year, [word.lower() for word in words]
+
+    def first_longest_key(self, words):
+        cleaned = "".join(words)
+        boundaries = {0}
+        position = 0
+        for word in words:
+            position += len(word)
+            boundaries.add(position)
+        # Reporters lead the citation ("JLR Note 37", "EWCA Civ 12"), so the key
+        # must start at the first word; a key further along is usually a note
+        # or a trailing initial ("C.L.P." is not "P").
+        best = None
+        for start, end, key in self.automaton.find_all(cleaned):
+            if start == 0 and end in boundaries and (best is None or len(key) > len(best)):
+                best = key
+        return best
+
+    def _fuzzy_key(self, cleaned):
+        if len(cleaned) < FUZZY_MIN_LENGTH:
+            return None
+        candidates = [key for key in self.keys_by_initial.get(cleaned[0], ()) if one_edit_apart(cleaned, key)]
+        close = difflib.get_close_matches(cleaned, candidates, n=1, cutoff=FUZZY_CUTOFF)
+        return close[0] if close else None
+
+    def resolve(self, actual_citation):
+        """
+        Returns (reporter, jurisdiction, year) for a citation the exact lookup
+        could not place, with empty strings when no key is close enough.
+        """
+        year, words = self.reporter_words(actual_citation)
+        key = self.first_longest_key(words) or self.fuzzy_key("".join(words))
+        if key is None:
+            return "", "", year
+        reporter, jurisdiction = self.reporterJurisdictionDict[key]
+        return reporter, jurisdiction, year
+
+
+_matchers = {}
+
+
+def get_reporter_matcher(reporterJurisdictionDict):
+    entry = _matchers.get(id(reporterJurisdictionDict))
+    if entry is None or entry[0] is not reporterJurisdictionDict:
+        entry = (reporterJurisdictionDict, ReporterMatcher(reporterJurisdictionDict))
+        _matchers[id(reporterJurisdictionDict)] = entry
+    return entry[1]
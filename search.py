@@ -0,0 +1,147 @@
+import argparse
+import sqlite3
+
+DB_PATH = "Jersey.db"
+SNIPPET_TOKENS = 16
+
+
+def create_search_tables(cur):
+    # Judgment text lives in judgment_text and citation names in citations; both
+    # FTS5 tables index them as external content and triggers keep them in sync.
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS judgment_text (
+        id INTEGER PRIMARY KEY,
+        neutral_citation TEXT UNIQUE,
+        body TEXT
+    )
+    """)
+    cur.execute("""
+    CREATE VIRTUAL TABLE IF NOT EXISTS judgment_fts USING fts5(
+        body, content='judgment_text', content_rowid='id', tokenize='porter unicode61'
+    )
+    """)
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS judgment_text_ai AFTER INSERT ON judgment_text BEGIN
+        INSERT INTO judgment_fts (rowid, body) VALUES (new.id, new.body);
+    END
+    """)
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS judgment_text_ad AFTER DELETE ON judgment_text BEGIN
+        INSERT INTO judgment_fts (judgment_fts, rowid, body) VALUES ('delete', old.id, old.body);
+    END
+    """)
+    cur.execute("""
+    CREATE VIRTUAL TABLE IF NOT EXISTS citation_fts USING fts5(
+        citation_name, content='citations', content_rowid='rowid', tokenize='unicode61'
+    )
+    """)
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS citations_fts_ai AFTER INSERT ON citations BEGIN
+        INSERT INTO citation_fts (rowid, citation_name) VALUES (new.rowid, new.citation_name);
+    END
+    """)
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS citations_fts_ad AFTER DELETE ON citations BEGIN
+        INSERT INTO citation_fts (citation_fts, rowid, citation_name) VALUES ('delete', old.rowid, old.citation_name);
+    END
+    """)
+
+
+def search_enabled(cur):
+    cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'judgment_fts'")
+    return cur.fetchone() is not None
+
+
+def rebuild_citation_index(cur):
+    cur.execute("INSERT INTO citation_fts (citation_fts) VALUES ('rebuild')")
+
+
+def write_judgment_text(cur, rows):
+    # Two PDFs of one judgment can share a batch; the last one wins, as it does in main_paper.
+    rows = list(dict(rows).items())
+    cur.executemany("DELETE FROM judgment_text WHERE neutral_citation = ?", ((key,) for key, _ in rows))
+    cur.executemany("INSERT INTO judgment_text (neutral_citation, body) VALUES (?, ?)", rows)
+
+
+def forget_judgments(cur, keys=None):
+    """Drops the indexed text of the given judgments, or of every judgment if keys is None."""
+    if not search_enabled(cur):
+        return
+    if keys is None:
+        cur.execute("DELETE FROM judgment_text")
+    else:
+        cur.executemany("DELETE FROM judgment_text WHERE neutral_citation = ?", ((key,) for key in keys))
+
+
+def search_judgments(conn, query, limit=10):
+    """
+    Full-text search over judgment bodies, best bm25 match first. query uses
+    FTS5 syntax, e.g. '"beneficial interest" NEAR trustee'.
+    """
+    cur = conn.execute(f"""
+        SELECT t.neutral_citation, m.name, m.court, m.judgment_date,
+               bm25(judgment_fts) AS score,
+               snippet(judgment_fts, 0, '[', ']', '...', {SNIPPET_TOKENS})
+        FROM judgment_fts
+        JOIN judgment_text t ON t.id = judgment_fts.rowid
+        LEFT JOIN main_paper m ON m.neutral_citation = t.neutral_citation
+        WHERE judgment_fts MATCH ?
+        ORDER BY score
+        LIMIT ?
+    """, (query, limit))
+    return [
+        {"neutral_citation": row[0], "name": row[1], "court": row[2], "judgment_date": row[3],
+         "score": row[4], "snippet": row[5]}
+        for row in cur.fetchall()
+    ]
+
+
+def search_citation_names(conn, query, limit=10):
+    """Searches citation_name; each hit is a citing judgment and the citation it made."""
+    cur = conn.execute(f"""
+        SELECT c.neutral_citation, m.court, m.judgment_date, c.citation_name, c.citation,
+               bm25(citation_fts) AS score,
+               snippet(citation_fts, 0, '[', ']', '...', {SNIPPET_TOKENS})
+        FROM citation_fts
+        JOIN citations c ON c.rowid = citation_fts.rowid
+        LEFT JOIN main_paper m ON m.neutral_citation = c.neutral_citation
+        WHERE citation_fts MATCH ?
+        ORDER BY score
+        LIMIT ?
+    """, (query, limit))
+    return [
+        {"neutral_citation": row[0], "court": row[1], "judgment_date": row[2], "citation_name": row[3],
+         "citation": row[4], "score": row[5], "snippet": row[6]}
+        for row in cur.fetchall()
+    ]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Search judgment text and citation names.")
+    parser.add_argument("query", nargs="?", help="FTS5 query, e.g. '\"constructive trust\"'")
+    parser.add_argument("--db-path", default=DB_PATH)
+    parser.add_argument("--citations", action="store_true", help="search citation names instead of judgment text")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--rebuild-citations", action="store_true",
+                        help="(re)index the citation names already in the database")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    conn = sqlite3.connect(args.db_path)
+    if args.rebuild_citations:
+        cur = conn.cursor()
+        create_search_tables(cur)
+        rebuild_citation_index(cur)
+        conn.commit()
+    if args.query:
+        if args.citations:
+            for hit in search_citation_names(conn, args.query, args.limit):
+                print(f"{hit['neutral_citation']}  {hit['court']}  {hit['judgment_date']}  "
+                      f"{hit['snippet']}  {hit['citation']}")
+        else:
+            for hit in search_judgments(conn, args.query, args.limit):
+                print(f"{hit['neutral_citation']}  {hit['court']}  {hit['judgment_date']}  {hit['name']}")
+                print(f"    {hit['snippet']}")
+    conn.close()
@@ -0,0 +1,247 @@
+import os
+import re
+import sys
+import time
+import argparse
+import sqlite3
+import subprocess
+from contextlib import closing
+from datetime import datetime, timezone
+
+from Modularized import REPORTER_DB_PATH, create_tables, begin_bulk_load, end_bulk_load
+from contents_index import create_index_table
+from analytics import create_query_tables, refresh_summaries
+from search import create_search_tables
+
+FEDERATED_DB_PATH = "Federated.db"
+MODULARIZED = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Modularized.py")
+
+MAIN_PAPER_COLUMNS = (
+    "neutral_citation, name, jurisdiction, judge, judgment_date, reported_in, court, vlex_document_id, link"
+)
+AUTHORITY_COLUMNS = "normalized_citation, citation, reporter, jurisdiction, year"
+MANIFEST_COLUMNS = "pdf_path, size, mtime_ns, content_hash, neutral_citation"
+
+
+def shard_name(jurisdiction):
+    # "England & Wales" -> "england_wales"
+    return re.sub(r"[^a-z0-9]+", "_", jurisdiction.lower()).strip("_")
+
+
+def shard_config(jurisdiction, root="."):
+    """
+    A shard per jurisdiction: PDFs under <root>/<jurisdiction>/, its database at
+    <root>/<jurisdiction>.db and reporters in <name>_reporters, the table
+    Reporters_extract.py --table creates for it.
+    """
+    return {
+        "jurisdiction": jurisdiction,
+        "pdf_folder": os.path.join(root, jurisdiction),
+        "db_path": os.path.join(root, jurisdiction + ".db"),
+        "reporter_table": f"{shard_name(jurisdiction)}_reporters",
+    }
+
+
+def shard_log_path(db_path):
+    return os.path.splitext(db_path)[0] + ".log"
+
+
+def build_shards(configs, parallel=None, reporter_db=REPORTER_DB_PATH, extra_args=()):
+    """
+    Runs Modularized.py for every shard, up to `parallel` at once. Each shard is
+    an independent process writing its own database, so shards can equally be
+    built on different machines and copied together for the merge. A shard's
+    output goes to a .log file next to its database and is echoed once it
+    exits. Returns {jurisdiction: exit code}.
+    """
+    parallel = max(1, parallel or os.cpu_count() or 1)
+    waiting = list(configs)
+    running = {}
+    results = {}
+    while waiting or running:
+        while waiting and len(running) < parallel:
+            config = waiting.pop(0)
+            command = [
+                sys.executable, MODULARIZED,
+                "--pdf-folder", config["pdf_folder"], "--db-path", config["db_path"],
+                "--reporter-db", reporter_db, "--reporter-table", config["reporter_table"],
+                *extra_args,
+            ]
+            # A file rather than a pipe: nobody reads a pipe until the shard exits,
+            # and a shard filling it would block forever.
+            log = open(shard_log_path(config["db_path"]), "w")
+            process = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT, text=True)
+            log.close()
+            running[process] = (config, time.perf_counter())
+        finished = next((process for process in running if process.poll() is not None), None)
+        if finished is None:
+            time.sleep(0.1)
+            continue
+        config, started = running.pop(finished)
+        with open(shard_log_path(config["db_path"])) as log:
+            output = log.read()
+        results[config["jurisdiction"]] = finished.returncode
+        print(f"[{config['jurisdiction']}] exit {finished.returncode} in {time.perf_counter() - started:.1f}s")
+        for line in output.splitlines():
+            print(f"[{config['jurisdiction']}] {line}")
+    return results
+
+
+def table_exists(cur, schema, table):
+    cur.execute(f"SELECT 1 FROM {schema}.sqlite_master WHERE type = 'table' AND name = ?", (table,))
+    return cur.fetchone() is not None
+
+
+def merge_shards(shard_paths, out_path=FEDERATED_DB_PATH, cache_mb=64):
+    """
+    Combines shard databases into one federated database, replacing out_path
+    atomically. Every table is copied with one INSERT ... SELECT per shard,
+    so the merge is a single pass over the shard rows. A judgment present in
+    several shards keeps the first shard's row, and citations are
+    de-duplicated by the same unique index ingestion uses. The analytics
+    summaries are rebuilt once at the end; the citation graph is not merged,
+    rebuild it with citation_graph.py build, and neither are near-duplicate
+    signatures.
+    """
+    tmp_path = out_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    begin_bulk_load(conn, cache_mb)
+    cur = conn.cursor()
+    create_tables(cur)
+    create_index_table(cur)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS merged_shards (
+        shard TEXT PRIMARY KEY,
+        db_path TEXT,
+        main_paper_rows INTEGER,
+        citation_rows INTEGER,
+        merged_at TEXT
+    )
+    """)
+
+    searchable = False
+    for shard_path in shard_paths:
+        if not os.path.exists(shard_path):
+            raise FileNotFoundError(shard_path)
+        with closing(sqlite3.connect(shard_path)) as shard:
+            if shard.execute("SELECT 1 FROM sqlite_master WHERE name = 'judgment_text'").fetchone():
+                searchable = True
+    if searchable:
+        # Triggers index the rows as they are copied in.
+        create_search_tables(cur)
+
+    merged_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    for shard_path in shard_paths:
+        cur.execute("ATTACH DATABASE ? AS shard", (shard_path,))
+        cur.execute(f"INSERT OR IGNORE INTO main_paper ({MAIN_PAPER_COLUMNS}) "
+                    f"SELECT {MAIN_PAPER_COLUMNS} FROM shard.main_paper ORDER BY rowid")
+        main_paper_rows = cur.rowcount
+        # Authority ids are local to each shard; citations are re-keyed through
+        # the normalized citation.
+        cur.execute(f"INSERT OR IGNORE INTO authority ({AUTHORITY_COLUMNS}) "
+                    f"SELECT {AUTHORITY_COLUMNS} FROM shard.authority ORDER BY authority_id")
+        cur.execute("""
+            INSERT OR IGNORE INTO citations (neutral_citation, authority_id, citation_name, citation)
+            SELECT c.neutral_citation, a.authority_id, c.citation_name, c.citation
+            FROM shard.citations c
+            JOIN shard.authority s ON s.authority_id = c.authority_id
+            JOIN main.authority a ON a.normalized_citation = s.normalized_citation
+            ORDER BY c.rowid
+        """)
+        citation_rows = cur.rowcount
+        if table_exists(cur, "shard", "ingest_manifest"):
+            cur.execute(f"INSERT OR IGNORE INTO ingest_manifest ({MANIFEST_COLUMNS}) "
+                        f"SELECT {MANIFEST_COLUMNS} FROM shard.ingest_manifest")
+        if table_exists(cur, "shard", "document_index"):
+            cur.execute("INSERT OR IGNORE INTO document_index SELECT vlex_document_id, pdf_path FROM shard.document_index")
+        if searchable and table_exists(cur, "shard", "judgment_text"):
+            cur.execute("""
+                INSERT INTO judgment_text (neutral_citation, body)
+                SELECT neutral_citation, body FROM shard.judgment_text
+                WHERE neutral_citation NOT IN (SELECT neutral_citation FROM main.judgment_text)
+                ORDER BY id
+            """)
+        cur.execute(
+            "INSERT OR REPLACE INTO merged_shards VALUES (?, ?, ?, ?, ?)",
+            (os.path.splitext(os.path.basename(shard_path))[0], shard_path, main_paper_rows, citation_rows, merged_at),
+        )
+        conn.commit()
+        cur.execute("DETACH DATABASE shard")
+        print(f"Merged {shard_path}: {main_paper_rows} judgment(s), {citation_rows} citation(s).")
+
+    create_query_tables(cur)
+    refresh_summaries(cur, full=True)
+    conn.commit()
+    end_bulk_load(conn)
+    conn.close()
+    os.replace(tmp_path, out_path)
+
+
+def attach_shards(conn, shard_paths):
+    """
+    Attaches shard databases to conn for cross-shard queries without a merge and
+    creates the temp views all_main_paper and all_citations (UNION ALL of every
+    shard, with a leading shard column; all_citations also carries each
+    authority's normalized citation, reporter, jurisdiction and year). SQLite
+    attaches at most 10 databases by default. Returns the schema names used.
+    """
+    schemas = []
+    for shard_path in shard_paths:
+        schema = shard_name(os.path.splitext(os.path.basename(shard_path))[0])
+        conn.execute("ATTACH DATABASE ? AS " + schema, (shard_path,))
+        schemas.append(schema)
+    views = {
+        "all_main_paper": "SELECT '{schema}' AS shard, * FROM {schema}.main_paper",
+        "all_citations": (
+            "SELECT '{schema}' AS shard, c.*, a.normalized_citation, a.reporter, a.jurisdiction, a.year "
+            "FROM {schema}.citations c JOIN {schema}.authority a ON a.authority_id = c.authority_id"
+        ),
+    }
+    for view, select in views.items():
+        conn.execute(f"DROP VIEW IF EXISTS temp.{view}")
+        conn.execute(f"CREATE TEMP VIEW {view} AS " + " UNION ALL ".join(
+            select.format(schema=schema) for schema in schemas
+        ))
+    return schemas
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build per-jurisdiction shard databases and merge or query them.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="ingest each jurisdiction into its own shard database",
+                                epilog="Any other options are passed on to Modularized.py.")
+    build.add_argument("jurisdictions", nargs="+", help="jurisdiction folder names, e.g. Jersey Guernsey")
+    build.add_argument("--root", default=".", help="directory holding the jurisdiction folders and shard databases")
+    build.add_argument("--parallel", type=int, default=None,
+                       help="number of shards built at once (default: one per CPU)")
+    build.add_argument("--reporter-db", default=REPORTER_DB_PATH)
+    merge = commands.add_parser("merge", help="combine shard databases into one federated database")
+    merge.add_argument("shards", nargs="+", help="shard database paths")
+    merge.add_argument("--out", default=FEDERATED_DB_PATH)
+    merge.add_argument("--cache-mb", type=int, default=64)
+    query = commands.add_parser("query", help="run SQL over attached shards (views all_main_paper, all_citations)")
+    query.add_argument("shards", nargs="+", help="shard database paths")
+    query.add_argument("--sql", required=True)
+    args, extra = parser.parse_known_args(argv)
+    if extra and args.command != "build":
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    args.extra = extra
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.command == "build":
+        configs = [shard_config(jurisdiction, args.root) for jurisdiction in args.jurisdictions]
+        results = build_shards(configs, args.parallel, args.reporter_db, args.extra)
+        sys.exit(1 if any(results.values()) else 0)
+    elif args.command == "merge":
+        merge_shards(args.shards, args.out, args.cache_mb)
+    elif args.command == "query":
+        conn = sqlite3.connect(":memory:")
+        attach_shards(conn, args.shards)
+        for row in conn.execute(args.sql):
+            print("  ".join("" if value is None else str(value) for value in row))
+        conn.close()
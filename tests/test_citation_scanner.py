@@ -0,0 +1,65 @@
+import os
+import re
+import random
+
+import pytest
+
+from Modularized import CITATION_PATTERN, NO_NAME_PATTERN, PDF_FOLDER, list_pdf_files
+from citation_scanner import CitationScanner
+
+TOKENS = [
+    "Smith v Jones ", "Smith v. Jones ", "Re A ", "In the matter of B ", "The Representation of C Ltd ",
+    "[2019] ", "(1998) ", "[2004] (2) ", "(2011) (3) ", "[20] ", "(1) ",
+    "JLR ", "JRC ", "1 WLR ", "EWCA Civ ", "All ER ", "L.R. ", "Note ", "Ch ", "AC ",
+    "1 ", "42 ", "123 ", "1304 ", "12345 ",
+    "at ", "para ", "dated ", "see ", "See for example ", "’s ", "& ", ": ", ", ", ". ", "; ",
+    "\n", "\n\n", "  ", "(", ")", "[", "]", "-", "x",
+]
+
+
+def reference(text, new_text):
+    named = [(m.groups(), True) for m in re.finditer(CITATION_PATTERN, text)]
+    unnamed = [(m.groups(), False) for m in re.finditer(NO_NAME_PATTERN, new_text)]
+    return named + unnamed
+
+
+def split_pages(text, rng):
+    cuts = sorted(rng.sample(range(1, len(text)), min(len(text) - 1, rng.randint(0, 12)))) if len(text) > 1 else []
+    pages = [text[start:end] for start, end in zip([0] + cuts, cuts + [len(text)])]
+    return [(page, page.replace("\n", " ")) for page in pages]
+
+
+def fuzzed_texts(count, seed=0):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield rng, "".join(rng.choice(TOKENS) for _ in range(rng.randint(1, 2000)))
+
+
+def test_scan_matches_finditer_on_fuzzed_text():
+    scanner = CitationScanner(CITATION_PATTERN, NO_NAME_PATTERN)
+    for _, text in fuzzed_texts(200):
+        new_text = text.replace("\n", " ")
+        assert list(scanner.scan(text, new_text)) == reference(text, new_text)
+
+
+def test_scan_stream_matches_scan_across_page_splits():
+    scanner = CitationScanner(CITATION_PATTERN, NO_NAME_PATTERN)
+    for rng, text in fuzzed_texts(200, seed=1):
+        new_text = text.replace("\n", " ")
+        assert list(scanner.scan_stream(split_pages(text, rng))) == list(scanner.scan(text, new_text))
+
+
+def sample_pdfs(every=50):
+    if not os.path.isdir(PDF_FOLDER):
+        return []
+    return list_pdf_files(PDF_FOLDER)[::every]
+
+
+@pytest.mark.parametrize("pdf_path", sample_pdfs())
+def test_scan_matches_finditer_on_corpus(pdf_path):
+    from Modularized import extract_text_from_pdf, iter_pdf_pages
+    scanner = CitationScanner(CITATION_PATTERN, NO_NAME_PATTERN)
+    text, new_text = extract_text_from_pdf(pdf_path)
+    expected = reference(text, new_text)
+    assert list(scanner.scan(text, new_text)) == expected
+    assert list(scanner.scan_stream(iter_pdf_pages(pdf_path))) == expected
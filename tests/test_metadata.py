@@ -0,0 +1,127 @@
+import os
+import re
+import random
+from datetime import datetime
+
+import pytest
+
+from Modularized import (CASE_NAME_START, HEADER_PAGES, PDF_FOLDER, extract_case_name, extract_metadata,
+                         list_pdf_files, parse_judgment_date)
+
+# The metadata extraction header_fields replaced: one IGNORECASE search of the
+# whole text per field, and a DOTALL search for the case name.
+OLD_PATTERNS = {
+    "jurisdiction": r"Jurisdiction:\s*(.*)",
+    "judge": r"Judge:\s*(.*)",
+    "judgment_date": r"Judgment\sDate:\s*(.*)|Date:\s*(.*)",
+    "neutral_citation": r"Judgment\scitation\s\(vLex\):\s*(.*)|Neutral\sCitation:\s*(.*)",
+    "reported_in": r"Reported\sIn:\s*(.*)",
+    "court": r"Court:\s*(.*)Date|Court:\s(.*)",
+    "vlex_document_id": r"vLex Document Id:\s*(.*)",
+    "link": r"Link:\s*(.*)"
+}
+
+
+def old_parse_judgment_date(date_str):
+    months = {
+        'Jan': 'January', 'Feb': 'February', 'Mar': 'March', 'Apr': 'April',
+        'May': 'May', 'Jun': 'June', 'Jul': 'July', 'Aug': 'August',
+        'Sep': 'September', 'Oct': 'October', 'Nov': 'November', 'Dec': 'December'
+    }
+    for abbr, full in months.items():
+        date_str = re.sub(rf"\b{abbr}\b", full, date_str, flags=re.IGNORECASE)
+    date_str = date_str.strip()
+    for fmt in ("%d %B %Y", "%d %b %Y", "%d %B, %Y", "%d %b, %Y"):
+        try:
+            return datetime.strptime(date_str, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return date_str
+
+
+def old_extract_case_name(text):
+    match = re.search(r"Otherwise, distribution or reproduction is not permitted(.*)\sJurisdiction:", text, re.DOTALL)
+    if match:
+        return re.sub(r"[.,;:!?]$", "", match.group(1).strip())
+    return None
+
+
+def old_extract_metadata(text, new_text):
+    meta = {"name": old_extract_case_name(new_text)}
+    for key, pat in OLD_PATTERNS.items():
+        m = re.search(pat, text, re.IGNORECASE)
+        value = None
+        if m:
+            for group in m.groups():
+                if group and group.strip():
+                    value = group.strip()
+                    break
+        if key == "judgment_date" and value:
+            value = old_parse_judgment_date(value)
+        meta[key] = value
+    return meta
+
+
+LABELS = [
+    "Jurisdiction:", "Judge:", "Judgment Date:", "Date:", "Judgment citation (vLex):", "Neutral Citation:",
+    "Reported In:", "Court:", "vLex Document Id:", "Link:", "jurisdiction:", "COURT:", "link:", "Judgment\nDate:",
+]
+VALUES = [
+    "Jersey", "Royal Court", "Royal Court Date", "Bailhache, Bailiff", "12 March 2019", "1 sept 2001",
+    "03 Dec, 1999", "[2019] JRC 042", "[2019] JLR 1", "VLEX-793642933", "https://vlex.co.uk/vid/793642933",
+    "", " ", "Court of Appeal Judgment Date: 4 May 2020", "Otherwise, distribution or reproduction is not permitted",
+    "A v B.", "Re C Trust;",
+]
+SEPARATORS = ["\n", " ", "\n\n", "\t", ""]
+
+
+def fuzzed_header(rng):
+    parts = []
+    if rng.random() < 0.8:
+        parts.append(CASE_NAME_START + rng.choice(SEPARATORS) + rng.choice(VALUES))
+    for _ in range(rng.randint(0, 14)):
+        parts.append(rng.choice(LABELS) + rng.choice(["", " ", "  "]) + rng.choice(VALUES))
+    if rng.random() < 0.5:
+        # Judgment body after the header, with labels that must not win over the header's.
+        for _ in range(rng.randint(0, 6)):
+            parts.append(rng.choice(VALUES + LABELS))
+    text = "".join(part + rng.choice(SEPARATORS) for part in parts)
+    return text, text.replace("\n", " ").replace("\r", " ")
+
+
+def test_extract_metadata_matches_whole_text_searches():
+    rng = random.Random(0)
+    for _ in range(5000):
+        text, new_text = fuzzed_header(rng)
+        assert extract_metadata(text, new_text) == old_extract_metadata(text, new_text)
+
+
+def test_extract_case_name_matches_dotall_search():
+    rng = random.Random(1)
+    pieces = [CASE_NAME_START, "Jurisdiction:", " Jurisdiction:", "\nJurisdiction:", "A v B", ".", "!", " ", "\n", "x"]
+    for _ in range(5000):
+        text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 12)))
+        assert extract_case_name(text) == old_extract_case_name(text)
+
+
+def test_parse_judgment_date_matches_substitutions():
+    for date_str in ["12 March 2019", "1 sept 2001", "03 Dec, 1999", "5 JAN 2010", "31 Feb 2001", "June 2004", ""]:
+        assert parse_judgment_date(date_str) == old_parse_judgment_date(date_str)
+
+
+def sample_pdfs(every=25):
+    if not os.path.isdir(PDF_FOLDER):
+        return []
+    return list_pdf_files(PDF_FOLDER)[::every]
+
+
+@pytest.mark.parametrize("pdf_path", sample_pdfs())
+def test_extract_metadata_matches_on_corpus(pdf_path):
+    from Modularized import extract_text_from_pdf, iter_pdf_pages
+    text, new_text = extract_text_from_pdf(pdf_path)
+    assert extract_metadata(text, new_text) == old_extract_metadata(text, new_text)
+    # The streaming parser reads the metadata from the header pages alone.
+    pages = list(iter_pdf_pages(pdf_path))[:HEADER_PAGES]
+    header_text = "".join(page for page, _ in pages).strip()
+    header_new_text = "".join(page for _, page in pages)
+    assert extract_metadata(header_text, header_new_text) == old_extract_metadata(text, new_text)
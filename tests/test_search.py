@@ -0,0 +1,30 @@
+import sqlite3
+
+from Modularized import BulkWriter, create_tables
+from search import create_search_tables
+
+
+def record(pdf_path, body):
+    meta = dict.fromkeys(
+        ["name", "jurisdiction", "judge", "judgment_date", "reported_in", "court", "vlex_document_id", "link"]
+    )
+    meta["neutral_citation"] = "[2020] JRC 1"
+    return {
+        "pdf_path": pdf_path, "size": 1, "mtime_ns": 1, "content_hash": pdf_path,
+        "meta": meta, "citations": [], "body": body,
+    }
+
+
+def test_same_judgment_twice_in_one_batch():
+    conn = sqlite3.connect(":memory:")
+    cur = conn.cursor()
+    create_tables(cur)
+    create_search_tables(cur)
+    writer = BulkWriter(conn)
+    writer.add_record(record("a.pdf", "first copy"))
+    writer.add_record(record("b.pdf", "second copy"))
+    writer.flush()
+    cur.execute("SELECT neutral_citation, body FROM judgment_text")
+    assert cur.fetchall() == [("[2020] JRC 1", "second copy")]
+    cur.execute("SELECT COUNT(*) FROM judgment_fts WHERE judgment_fts MATCH 'copy'")
+    assert cur.fetchone()[0] == 1
@@ -0,0 +1,88 @@
+import os
+import json
+import zlib
+
+TEXT_CACHE_DIR = ".text_cache"
+TEXT_CACHE_MAX_MB = 1024
+
+
+class TextCache:
+    """
+    On-disk cache of extract_text_from_pdf output, one zlib-compressed file per
+    (content hash, extractor version). File mtimes record last use, and the
+    least recently used entries are evicted once the cache exceeds max_bytes.
+    """
+
+    def __init__(self, cache_dir=TEXT_CACHE_DIR, max_bytes=TEXT_CACHE_MAX_MB * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.total_bytes = None
+
+    def entry_path(self, content_hash, version):
+        return os.path.join(self.cache_dir, content_hash[:2], f"{content_hash}-v{version}.json.z")
+
+    def get(self, content_hash, version):
+        path = self.entry_path(content_hash, version)
+        try:
+            with open(path, "rb") as f:
+                text, new_text = json.loads(zlib.decompress(f.read()))
+        except (OSError, ValueError, zlib.error):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return text, new_text
+
+    def put(self, content_hash, version, text, new_text):
+        path = self.entry_path(content_hash, version)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = zlib.compress(json.dumps([text, new_text]).encode("utf-8"), 6)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        if self.total_bytes is None:
+            self.total_bytes = sum(size for _, size, _ in self.entries())
+        else:
+            self.total_bytes += len(data)
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+
+    def entries(self):
+        if not os.path.isdir(self.cache_dir):
+            return []
+        found = []
+        for root, dirs, files in os.walk(self.cache_dir):
+            for filename in files:
+                if filename.endswith(".json.z"):
+                    path = os.path.join(root, filename)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    found.append((stat.st_mtime, stat.st_size, path))
+        return found
+
+    def evict(self):
+        # Rescan rather than trust the running total: worker processes share the
+        # directory and each only sees its own writes.
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        self.total_bytes = total
+
+    def clear(self):
+        for _, _, path in self.entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.total_bytes = 0